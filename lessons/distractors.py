@@ -0,0 +1,121 @@
+"""
+Per-list distractor pools for select-mode questions.
+
+A pool holds only (pk, translation, word_type) of a list's words in flat
+arrays, built with one query and kept in process memory until the list's
+words change (see lessons.signals). A change bumps the list's version number
+in the Django cache, so other processes rebuild the pool as well when the
+cache backend is shared; with a per-process cache, pools are rebuilt after
+POOL_MAX_AGE seconds at the latest.
+"""
+import random
+import time
+
+from django.core.cache import cache
+
+from vocab.models import Word
+
+# Upper bound on cached pools; the oldest one is dropped first
+MAX_POOLS = 256
+
+# Seconds a pool is reused without a version change
+POOL_MAX_AGE = 300
+
+# version of all pools, and of the pool of one list
+VERSION_KEY = 'distractors:version'
+LIST_VERSION_KEY = 'distractors:version:{}'
+
+
+class DistractorPool:
+    def __init__(self, rows):
+        self.pks = []
+        self.translations = []
+        self.word_types = []
+        self.position = {}  # pk -> index
+        self.by_type = {}   # word_type -> [index]
+        for pk, translation, word_type in rows:
+            index = len(self.pks)
+            self.pks.append(pk)
+            self.translations.append(translation or "")
+            self.word_types.append(word_type)
+            self.position[pk] = index
+            self.by_type.setdefault(word_type, []).append(index)
+
+    def __len__(self):
+        return len(self.pks)
+
+    def sample(self, word_pk, correct_text, k=3, rng=random):
+        """
+        Return up to ``k`` distinct wrong translations for the word.
+
+        Words of the same word_type are preferred; the rest is filled from the
+        whole list. Draws are random index picks, so the cost per question does
+        not depend on the size of the list.
+        """
+        chosen = []
+        skip = {correct_text.casefold()}
+        index = self.position.get(word_pk)
+        if index is not None:
+            self._draw(self.by_type[self.word_types[index]], k, rng, skip, chosen)
+        if len(chosen) < k:
+            self._draw(range(len(self.pks)), k, rng, skip, chosen)
+        return chosen
+
+    def _draw(self, candidates, k, rng, skip, chosen):
+        attempts = 4 * k
+        if len(candidates) <= attempts:
+            # few candidates: try each of them once, in random order
+            picks = rng.sample(candidates, len(candidates))
+        else:
+            picks = (candidates[rng.randrange(len(candidates))] for _ in range(attempts))
+        for i in picks:
+            if len(chosen) == k:
+                return
+            text = self.translations[i]
+            if text.casefold() in skip:
+                continue
+            skip.add(text.casefold())
+            chosen.append(text)
+
+
+# list pk -> (versions, expires at, DistractorPool)
+_pools = {}
+
+
+def _versions(vocab_list_id):
+    keys = [VERSION_KEY, LIST_VERSION_KEY.format(vocab_list_id)]
+    found = cache.get_many(keys)
+    return tuple(found.get(key, 0) for key in keys)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_pool(vocab_list_id):
+    versions = _versions(vocab_list_id)
+    now = time.monotonic()
+    cached = _pools.get(vocab_list_id)
+    if cached is not None and cached[0] == versions and cached[1] > now:
+        return cached[2]
+    rows = Word.objects.filter(lists=vocab_list_id).values_list('pk', 'translation', 'word_type')
+    pool = DistractorPool(rows)
+    _pools.pop(vocab_list_id, None)
+    if len(_pools) >= MAX_POOLS:
+        _pools.pop(next(iter(_pools)), None)
+    _pools[vocab_list_id] = (versions, now + POOL_MAX_AGE, pool)
+    return pool
+
+
+def invalidate(vocab_list_ids=None):
+    """Rebuild the pools of the given lists, or all pools, in every process on next access."""
+    if vocab_list_ids is None:
+        _pools.clear()
+        _bump(VERSION_KEY)
+        return
+    for vocab_list_id in vocab_list_ids:
+        _pools.pop(vocab_list_id, None)
+        _bump(LIST_VERSION_KEY.format(vocab_list_id))
@@ -1,14 +1,15 @@
 import random
 
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
 from django.utils import timezone
 
-from sprachlernen.constants import LEARNED_THRESHOLD
-from vocab.models import Progress
-
-
-def get_session_key(user_pk, vocab_list_pk):
-    """Generate consistent session key for lesson word list."""
-    return f"lesson_words_{user_pk}_{vocab_list_pk}"
+from sprachlernen.constants import LEARNED_THRESHOLD, REVIEW_SESSION_SIZE
+from vocab import list_progress
+from vocab.models import ListMembership, Progress, Word
+from . import distractors
+from .scheduler import last_correct_after_correct, next_review_after_correct, next_review_date
 
 
 def clamp_index(index, total):
@@ -26,33 +27,138 @@ class LessonService:
         self.vocab_list = vocab_list
 
     def get_words(self):
-        # Active words are those that have NOT yet reached the learned threshold
-        words = self.vocab_list.words.all().order_by('word')
-
-        return [
-            w for w in words
-            if not Progress.objects.filter(
-                user=self.user,
-                word=w,
-                correct_count__gte=LEARNED_THRESHOLD,
-            ).exists()
-        ]
+        # Active words are those that have NOT yet reached the learned threshold,
+        # selected with a single NOT EXISTS query instead of one query per word
+        learned = Progress.objects.filter(
+            user=self.user,
+            word=OuterRef('pk'),
+            correct_count__gte=LEARNED_THRESHOLD,
+        )
+        return self.vocab_list.words.filter(~Exists(learned)).order_by('word', 'pk')
+
+    def get_word_ids(self):
+        """Primary keys of the active words, in lesson order (one query)."""
+        return list(self.get_words().values_list('pk', flat=True))
 
-    def get_options(self, word):
-        all_words = list(self.vocab_list.words.exclude(pk=word.pk))
-        wrong_words = random.sample(all_words, min(3, len(all_words)))
+    def get_options(self, word, rng=random):
+        """
+        Answer options for a select-mode question. Pass a seeded ``rng`` (see
+        LessonState.rng) to get the same options on every request.
+        """
+        pool = distractors.get_pool(self.vocab_list.pk)
+        wrong_translations = pool.sample(word.pk, word.translation, k=3, rng=rng)
         options = [{"text": word.translation, "correct": True}] + [
-            {"text": w.translation, "correct": False} for w in wrong_words
+            {"text": text, "correct": False} for text in wrong_translations
         ]
-        random.shuffle(options)
+        rng.shuffle(options)
         return options
 
+    def words_by_pk(self, ids):
+        return self.vocab_list.words.filter(pk__in=ids).in_bulk()
+
     def update_progress(self, word, correct):
-        p, created = Progress.objects.get_or_create(user=self.user, word=word)
-        if correct:
-            p.correct_count += 1
-            p.last_correct = timezone.localdate()
+        today = timezone.localdate()
+        progress = Progress.objects.filter(user=self.user, word=word)
+
+        if not correct:
+            # a wrong answer makes the word due for review again today
+            if not progress.update(next_review=today):
+                Progress.objects.get_or_create(user=self.user, word=word, defaults={'next_review': today})
+            return
+
+        # increment in SQL so concurrent answers cannot overwrite each other,
+        # and write only the changed columns of Progress, UserListProgress and User
+        with transaction.atomic():
+            updated = progress.update(
+                correct_count=F('correct_count') + 1,
+                last_correct=last_correct_after_correct(today),
+                next_review=next_review_after_correct(today),
+            )
+            if updated:
+                correct_count = progress.values_list('correct_count', flat=True).get()
+            else:
+                correct_count = self._create_correct_progress(word, today)
+            list_progress.record_correct_answer(self.user, word, correct_count, today)
             # User points system
-            self.user.progress_total += 1
-            self.user.save()
-        p.save()
+            get_user_model().objects.filter(pk=self.user.pk).update(progress_total=F('progress_total') + 1)
+
+    def record_answers(self, results):
+        """
+        Apply a round of answers, {word pk: correct}, in one transaction with
+        the same effect as calling update_progress for each of them, but a
+        fixed number of queries for the whole round.
+        """
+        today = timezone.localdate()
+        correct_ids = [pk for pk, correct in results.items() if correct]
+        wrong_ids = [pk for pk, correct in results.items() if not correct]
+        progress = Progress.objects.filter(user=self.user)
+
+        with transaction.atomic():
+            # rows of words answered for the first time; ignore_conflicts keeps
+            # a row a concurrent request created, which is then updated below
+            existing = set(progress.filter(word_id__in=results).values_list('word_id', flat=True))
+            Progress.objects.bulk_create(
+                [Progress(user=self.user, word_id=pk, next_review=today) for pk in results if pk not in existing],
+                ignore_conflicts=True,
+            )
+            if wrong_ids:
+                progress.filter(word_id__in=wrong_ids).update(next_review=today)
+            if not correct_ids:
+                return
+            progress.filter(word_id__in=correct_ids).update(
+                correct_count=F('correct_count') + 1,
+                last_correct=last_correct_after_correct(today),
+                next_review=next_review_after_correct(today),
+            )
+            correct_counts = dict(progress.filter(word_id__in=correct_ids).values_list('word_id', 'correct_count'))
+            list_progress.record_correct_answers(self.user, correct_counts, today)
+            get_user_model().objects.filter(pk=self.user.pk).update(
+                progress_total=F('progress_total') + len(correct_ids)
+            )
+
+    def _create_correct_progress(self, word, today):
+        """
+        Create the Progress row of a first correct answer and return the new count.
+        If a concurrent request created the row first, the unique (user, word)
+        constraint rejects this insert and the answer is counted on that row instead.
+        """
+        try:
+            with transaction.atomic():
+                Progress.objects.create(
+                    user=self.user, word=word, correct_count=1, last_correct=today,
+                    next_review=next_review_date(1, today),
+                )
+            return 1
+        except IntegrityError:
+            progress = Progress.objects.filter(user=self.user, word=word)
+            progress.update(
+                correct_count=F('correct_count') + 1,
+                last_correct=last_correct_after_correct(today),
+                next_review=next_review_after_correct(today),
+            )
+            return progress.values_list('correct_count', flat=True).get()
+
+
+class ReviewService(LessonService):
+    """
+    Review session over the words that are due today (next_review <= today)
+    in any of the user's active lists, most overdue first.
+    """
+
+    def __init__(self, user):
+        super().__init__(user, vocab_list=None)
+
+    def get_due_progress(self):
+        return Progress.objects.filter(
+            user=self.user,
+            next_review__lte=timezone.localdate(),
+            word__in=ListMembership.objects.filter(vocab_list__in=self.user.active_lists.values('pk')).values('word_id'),
+        )
+
+    def get_word_ids(self):
+        """Up to REVIEW_SESSION_SIZE due word ids, served by the (user, next_review) index."""
+        due = self.get_due_progress().order_by('next_review', 'pk')
+        return list(due.values_list('word_id', flat=True)[:REVIEW_SESSION_SIZE])
+
+    def words_by_pk(self, ids):
+        return Word.objects.filter(pk__in=ids).in_bulk()
@@ -0,0 +1,108 @@
+"""
+Compact state of the running lesson, kept under one session key.
+
+A lesson is a scope (a list pk or 'review'), a random seed, a cursor (the
+index of the current word), the number of words served as the current round
+(see lessons.rounds) and the word pks in lesson order. The pks are
+stored as zigzag varint deltas, base64 encoded: words of a list have nearby
+pks, so most take one or two bytes. The state is signed, so a tampered or
+stale value is rebuilt instead of trusted.
+
+Starting a lesson replaces the previous state, and select-mode options are
+derived from (seed, word pk) on every request, so the session does not grow
+with the number of lessons or questions.
+"""
+import base64
+import random
+
+from django.core import signing
+
+SESSION_KEY = 'lesson_state'
+
+# keys written by earlier versions of the lesson views
+LEGACY_KEY_PREFIXES = ('lesson_words_', 'options_')
+
+_signer = signing.Signer(salt='lessons.lesson_state')
+
+
+def encode_ids(ids):
+    """Encode pks as zigzag varint deltas: [7, 8, 9, 3] -> 'DgICCw'."""
+    data = bytearray()
+    previous = 0
+    for pk in ids:
+        delta = pk - previous
+        previous = pk
+        value = delta * 2 if delta >= 0 else -delta * 2 - 1
+        while value >= 0x80:
+            data.append(value & 0x7F | 0x80)
+            value >>= 7
+        data.append(value)
+    return base64.urlsafe_b64encode(bytes(data)).rstrip(b'=').decode('ascii')
+
+
+def decode_ids(text):
+    """The inverse of ``encode_ids``. Raises ValueError for malformed input."""
+    try:
+        data = base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+    except (TypeError, ValueError) as exc:
+        raise ValueError('Invalid id encoding') from exc
+    ids = []
+    previous = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value >> 1 if value % 2 == 0 else -(value + 1 >> 1)
+        ids.append(previous)
+        value = shift = 0
+    if shift:
+        raise ValueError('Truncated id encoding')
+    return ids
+
+
+class LessonState:
+    def __init__(self, scope, ids, seed=None, cursor=0, round_size=0):
+        self.scope = str(scope)
+        self.ids = list(ids)
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.cursor = cursor
+        # words from the cursor on that were served as a round and may be answered
+        self.round_size = round_size
+
+    def rng(self, word_pk):
+        """A random generator that gives the same draws for the same (seed, word)."""
+        return random.Random(f'{self.seed}:{word_pk}')
+
+    def dumps(self):
+        return _signer.sign(f'{self.scope}:{self.seed}:{self.cursor}:{self.round_size}:{encode_ids(self.ids)}')
+
+    @classmethod
+    def loads(cls, value):
+        """Restore a state from ``dumps``; None if the value is missing, tampered or malformed."""
+        if not value:
+            return None
+        try:
+            scope, seed, cursor, round_size, ids = _signer.unsign(value).rsplit(':', 4)
+            return cls(scope, decode_ids(ids), seed=int(seed), cursor=int(cursor), round_size=int(round_size))
+        except (signing.BadSignature, ValueError):
+            return None
+
+
+def load(session, scope):
+    """The state of the lesson over ``scope``, or None if another (or no) lesson is running."""
+    state = LessonState.loads(session.get(SESSION_KEY))
+    if state is None or state.scope != str(scope):
+        return None
+    return state
+
+
+def save(session, state):
+    """Store ``state`` as the running lesson, replacing any previous one."""
+    for key in [key for key in session.keys() if key.startswith(LEGACY_KEY_PREFIXES)]:
+        del session[key]
+    session[SESSION_KEY] = state.dumps()
+
+
+def clear(session):
+    session.pop(SESSION_KEY, None)
@@ -0,0 +1,124 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+
+from lessons.lesson_service import LessonService
+from vocab.models import LanguageLevel, ListMembership, VocabularyList, Word
+
+PROFILES = ('default', 'production')
+
+
+class Command(BaseCommand):
+    help = (
+        'Submit lesson answers from many threads against a scratch SQLite database and '
+        'compare throughput and "database is locked" errors of the database profiles'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Number of answering threads (default: 8)')
+        parser.add_argument('--answers', type=int, default=200, help='Answers per thread (default: 200)')
+        parser.add_argument('--words', type=int, default=50, help='Words in the test list (default: 50)')
+        parser.add_argument(
+            '--profile', choices=PROFILES + ('both',), default='both',
+            help='Database profile to measure (default: both)'
+        )
+        # internal: run the measurement in this process, against the configured (scratch) database
+        parser.add_argument('--worker', action='store_true', help='Internal, do not use')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.run_worker(options)
+
+        profiles = PROFILES if options['profile'] == 'both' else (options['profile'],)
+        results = [self.run_profile(profile, options) for profile in profiles]
+
+        self.stdout.write(f"{options['threads']} threads x {options['answers']} answers")
+        self.stdout.write(f"{'Profile':<12}  {'Answers':>8}  {'Seconds':>8}  {'Answers/s':>10}  {'Locked':>7}  {'Lock rate':>9}")
+        for result in results:
+            attempts = result['ok'] + result['locked']
+            rate = result['ok'] / result['seconds'] if result['seconds'] > 0 else 0.0
+            lock_rate = result['locked'] / attempts * 100 if attempts else 0.0
+            self.stdout.write(
+                f"{result['profile']:<12}  {result['ok']:>8}  {result['seconds']:>8.2f}  "
+                f"{rate:>10.0f}  {result['locked']:>7}  {lock_rate:>8.1f}%"
+            )
+
+    def run_profile(self, profile, options):
+        """Run the worker in a child process, with the profile and a fresh database file."""
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                SPRACHLERNEN_DB_PROFILE=profile,
+                SPRACHLERNEN_DB_NAME=os.path.join(tmp, 'stress.sqlite3'),
+            )
+            command = [
+                sys.executable, sys.argv[0], 'stress_answers', '--worker',
+                '--threads', str(options['threads']),
+                '--answers', str(options['answers']),
+                '--words', str(options['words']),
+            ]
+            completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f"The {profile} run failed:\n{completed.stderr}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['profile'] = profile
+        return result
+
+    def run_worker(self, options):
+        if connection.vendor != 'sqlite' or 'SPRACHLERNEN_DB_NAME' not in os.environ:
+            raise CommandError('--worker only runs against a scratch SQLite database, use the command without it')
+        call_command('migrate', verbosity=0)
+
+        level = LanguageLevel.objects.create(code='S1', description='Stress test')
+        vocab_list = VocabularyList.objects.create(name='Stress test', level=level)
+        words = Word.objects.bulk_create(
+            [Word(word=f'word-{i}', translation=f'translation {i}', vocab_list=vocab_list) for i in range(options['words'])]
+        )
+        ListMembership.objects.bulk_create([ListMembership(vocab_list=vocab_list, word=word) for word in words])
+        User = get_user_model()
+        users = [User.objects.create_user(username=f'stress-{i}') for i in range(options['threads'])]
+        connection.close()
+
+        counts = {'ok': 0, 'locked': 0}
+        counts_lock = threading.Lock()
+        start = threading.Barrier(len(users))
+
+        def answer(user):
+            service = LessonService(user, vocab_list)
+            rng = random.Random(user.pk)
+            ok = locked = 0
+            start.wait()
+            for _ in range(options['answers']):
+                try:
+                    service.update_progress(rng.choice(words), rng.random() < 0.8)
+                    ok += 1
+                except OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    locked += 1
+            close_old_connections()
+            connection.close()
+            with counts_lock:
+                counts['ok'] += ok
+                counts['locked'] += locked
+
+        threads = [threading.Thread(target=answer, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counts['seconds'] = time.perf_counter() - started
+
+        # the parent process reads the last line
+        self.stdout.write(json.dumps(counts))
@@ -0,0 +1,71 @@
+"""
+Lesson rounds: a batch of questions answered in the browser.
+
+A round is the next ``size`` words of the running lesson (see lessons.lesson_state)
+sent as JSON with, per word, an answer digest instead of the translation:
+sha256 of "<salt>:<word pk>:<normalized answer>", salted with the lesson seed.
+The client checks answers by hashing them the same way and posts all of them
+at once; the server checks them again and applies the Progress updates of
+the whole round in one transaction (LessonService.record_answers).
+"""
+import hashlib
+
+ROUND_SIZE = 10
+MAX_ROUND_SIZE = 50
+
+
+def normalize_answer(text):
+    """The comparison the lesson views use: case-insensitive, surrounding space ignored."""
+    return (text or '').strip().lower()
+
+
+def answer_digest(salt, word_pk, answer):
+    return hashlib.sha256(f'{salt}:{word_pk}:{normalize_answer(answer)}'.encode()).hexdigest()
+
+
+def is_correct(word, answer):
+    return normalize_answer(answer) == normalize_answer(word.translation)
+
+
+def build(service, state, words, mode):
+    """The JSON payload of a round over ``words`` (Word objects, in lesson order)."""
+    questions = []
+    for word in words:
+        question = {
+            'id': word.pk,
+            'word': word.word,
+            'example': word.example or '',
+            'digest': answer_digest(state.seed, word.pk, word.translation),
+        }
+        if mode == 'select':
+            # the same options as lesson_select shows for this word
+            question['options'] = [
+                option['text'] for option in service.get_options(word, rng=state.rng(word.pk))
+            ]
+        questions.append(question)
+    return {
+        'mode': mode,
+        'salt': str(state.seed),
+        'cursor': state.cursor,
+        'total': len(state.ids),
+        'words': questions,
+    }
+
+
+def parse_answers(data):
+    """
+    {word pk: answer text} from a posted ``{"answers": [{"word": pk, "answer": text}]}``;
+    the first answer for a word counts. Raises ValueError for malformed input.
+    """
+    answers = {}
+    items = data.get('answers') if isinstance(data, dict) else None
+    if not isinstance(items, list) or len(items) > MAX_ROUND_SIZE:
+        raise ValueError(f'Expected a list of at most {MAX_ROUND_SIZE} answers')
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('answer', ''), str):
+            raise ValueError('Invalid answer')
+        word_pk = item.get('word')
+        if not isinstance(word_pk, int) or isinstance(word_pk, bool):
+            raise ValueError('Invalid word id')
+        answers.setdefault(word_pk, item.get('answer', ''))
+    return answers
@@ -0,0 +1,51 @@
+"""
+Spaced repetition schedule for Progress.next_review.
+
+Leitner-style: every correct answer moves a word to the next, longer
+interval in REVIEW_INTERVALS; a wrong answer makes it due again today.
+"""
+from datetime import timedelta
+
+from django.db.models import Case, DateField, F, Value, When
+
+from sprachlernen.constants import LEARNED_THRESHOLD, REVIEW_INTERVALS
+
+
+def review_interval(correct_count):
+    """Days until the next review of a word answered correctly ``correct_count`` times."""
+    index = min(max(correct_count, 1), len(REVIEW_INTERVALS)) - 1
+    return REVIEW_INTERVALS[index]
+
+
+def next_review_date(correct_count, today):
+    return today + timedelta(days=review_interval(correct_count))
+
+
+def next_review_after_correct(today):
+    """
+    Expression for next_review in the UPDATE that increments correct_count.
+
+    The right-hand sides of an UPDATE see the row before the update, so
+    ``correct_count`` here is the count without the current answer.
+    """
+    return Case(
+        *[
+            When(correct_count=count, then=Value(next_review_date(count + 1, today)))
+            for count in range(len(REVIEW_INTERVALS) - 1)
+        ],
+        default=Value(next_review_date(len(REVIEW_INTERVALS), today)),
+        output_field=DateField(),
+    )
+
+
+def last_correct_after_correct(today):
+    """
+    Expression for last_correct in the same UPDATE: the day of the answer,
+    unless the word was learned already. Reviews of a learned word keep the
+    day it was learned, which "mastered today" and the list unlock dates use.
+    """
+    return Case(
+        When(correct_count__gte=LEARNED_THRESHOLD, then=F('last_correct')),
+        default=Value(today),
+        output_field=DateField(),
+    )
@@ -0,0 +1,9 @@
+from django.dispatch import receiver
+
+from vocab.signals import word_list_changed, words_edited
+from . import distractors
+
+
+@receiver([word_list_changed, words_edited])
+def invalidate_distractor_pools(sender, vocab_list_ids, **kwargs):
+    distractors.invalidate(vocab_list_ids)
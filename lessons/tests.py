@@ -1,2 +1,403 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from sprachlernen.constants import LEARNED_THRESHOLD, LOCK_DAYS, REVIEW_INTERVALS
+from users.services import DashboardService
+from vocab.models import LanguageLevel, ListMembership, Progress, UserListProgress, VocabularyList, Word
+from vocab import list_progress
+from vocab.testing import LearnerTestCase, add_words
+from . import distractors, lesson_state, rounds
+from .lesson_service import LessonService, ReviewService
+from .lesson_state import LessonState
+
+
+class LessonServiceWordsTests(LearnerTestCase):
+    def setUp(self):
+        self.service = LessonService(self.user, self.vocab_list)
+
+    def add_words(self, count, start=0):
+        return add_words(self.vocab_list, count, word='wort{i:04d}', start=start)
+
+    def test_learned_words_are_excluded(self):
+        learned, in_progress, new = self.add_words(3)
+        Progress.objects.create(user=self.user, word=learned, correct_count=LEARNED_THRESHOLD)
+        Progress.objects.create(user=self.user, word=in_progress, correct_count=LEARNED_THRESHOLD - 1)
+        # progress of another user does not count
+        other = get_user_model().objects.create_user(username='other', password='pw')
+        Progress.objects.create(user=other, word=new, correct_count=LEARNED_THRESHOLD)
+
+        self.assertEqual(self.service.get_word_ids(), [in_progress.pk, new.pk])
+
+    def test_query_count_does_not_depend_on_list_size(self):
+        for size in (5, 200):
+            self.add_words(size, start=Word.objects.count())
+            with self.assertNumQueries(1):
+                ids = self.service.get_word_ids()
+            self.assertEqual(len(ids), Word.objects.count())
+
+
+class DistractorPoolTests(LearnerTestCase):
+    def setUp(self):
+        self.service = LessonService(self.user, self.vocab_list)
+        distractors.invalidate()
+
+    def test_options_prefer_same_word_type(self):
+        words = Word.objects.bulk_create(
+            [Word(word=f'verb{i}', translation=f'to do {i}', word_type='verb', vocab_list=self.vocab_list) for i in range(4)]
+            + [Word(word=f'nomen{i}', translation=f'thing {i}', word_type='noun', vocab_list=self.vocab_list) for i in range(20)]
+        )
+        self.vocab_list.words.add(*words)
+        options = self.service.get_options(words[0])
+
+        self.assertEqual(len(options), 4)
+        self.assertEqual([o['text'] for o in options if o['correct']], ['to do 0'])
+        self.assertEqual({o['text'] for o in options if not o['correct']}, {'to do 1', 'to do 2', 'to do 3'})
+
+    def test_pool_is_cached_until_the_list_changes(self):
+        word = Word.objects.create(word='Haus', translation='house', vocab_list=self.vocab_list)
+        Word.objects.create(word='Baum', translation='tree', vocab_list=self.vocab_list)
+        self.service.get_options(word)
+        with self.assertNumQueries(0):
+            options = self.service.get_options(word)
+        self.assertEqual(len(options), 2)
+
+        # saving a word invalidates the pool of its list
+        Word.objects.create(word='Hund', translation='dog', vocab_list=self.vocab_list)
+        self.assertEqual(len(self.service.get_options(word)), 3)
+
+    def test_pools_of_other_processes_follow_the_version(self):
+        word = Word.objects.create(word='Haus', translation='house', vocab_list=self.vocab_list)
+        self.service.get_options(word)
+        # another process changed the list: only the version in the shared cache tells
+        Word.objects.bulk_create([Word(word='Baum', translation='tree', vocab_list=self.vocab_list)])
+        ListMembership.objects.bulk_create([ListMembership(vocab_list=self.vocab_list, word=Word.objects.get(word='Baum'))])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.service.get_options(word)), 1)
+        cache.incr(distractors.LIST_VERSION_KEY.format(self.vocab_list.pk))
+        self.assertEqual(len(self.service.get_options(word)), 2)
+
+        # without a version change a pool expires after POOL_MAX_AGE
+        Word.objects.bulk_create([Word(word='Hund', translation='dog', vocab_list=self.vocab_list)])
+        ListMembership.objects.bulk_create([ListMembership(vocab_list=self.vocab_list, word=Word.objects.get(word='Hund'))])
+        with mock.patch('lessons.distractors.time.monotonic', return_value=time.monotonic() + distractors.POOL_MAX_AGE):
+            self.assertEqual(len(self.service.get_options(word)), 3)
+
+
+class UpdateProgressTests(LearnerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.word = Word.objects.create(word='Haus', translation='house', vocab_list=cls.vocab_list)
+
+    def setUp(self):
+        self.service = LessonService(self.user, self.vocab_list)
+
+    def test_correct_answers_increment_counters(self):
+        self.service.update_progress(self.word, True)
+        self.service.update_progress(self.word, True)
+        self.service.update_progress(self.word, False)
+
+        progress = Progress.objects.get(user=self.user, word=self.word)
+        self.assertEqual(progress.correct_count, 2)
+        self.assertEqual(progress.last_correct, timezone.localdate())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.progress_total, 2)
+
+    def test_wrong_answer_records_the_attempt(self):
+        self.service.update_progress(self.word, False)
+        self.assertEqual(Progress.objects.get(user=self.user, word=self.word).correct_count, 0)
+
+    def test_concurrently_created_row_is_incremented(self):
+        # another request created the row between our UPDATE and INSERT
+        Progress.objects.create(user=self.user, word=self.word, correct_count=2)
+        self.assertEqual(self.service._create_correct_progress(self.word, timezone.localdate()), 3)
+        self.assertEqual(Progress.objects.filter(user=self.user, word=self.word).count(), 1)
+
+    def test_user_row_is_not_rewritten(self):
+        self.service.update_progress(self.word, True)
+        with CaptureQueriesContext(connection) as queries:
+            self.service.update_progress(self.word, True)
+        user_updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "users_user"')]
+        self.assertEqual(len(user_updates), 1)
+        self.assertNotIn('password', user_updates[0])
+
+
+class ConcurrentProgressTests(TransactionTestCase):
+    def test_parallel_correct_answers_are_not_lost(self):
+        user = get_user_model().objects.create_user(username='learner', password='pw')
+        level = LanguageLevel.objects.create(code='A1', description='Level A1')
+        vocab_list = VocabularyList.objects.create(name='System List A1', level=level)
+        word = Word.objects.create(word='Haus', translation='house', vocab_list=vocab_list)
+        Progress.objects.create(user=user, word=word)
+
+        threads, answers = 8, 5
+        start = threading.Barrier(threads)
+        errors = []
+
+        def answer():
+            try:
+                start.wait()
+                service = LessonService(user, vocab_list)
+                for _ in range(answers):
+                    # the in-memory test database reports lock conflicts instead of waiting;
+                    # update_progress is atomic, so retrying it cannot double count
+                    for _ in range(200):
+                        try:
+                            service.update_progress(word, True)
+                            break
+                        except OperationalError as e:
+                            if 'locked' not in str(e):
+                                raise
+                            time.sleep(0.005)
+                    else:
+                        raise AssertionError('database stayed locked')
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=answer) for _ in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Progress.objects.get(user=user, word=word).correct_count, threads * answers)
+        user.refresh_from_db()
+        self.assertEqual(user.progress_total, threads * answers)
+
+
+class ReviewSchedulingTests(LearnerTestCase):
+    word_count = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user.active_lists.add(cls.vocab_list)
+
+    def setUp(self):
+        self.service = LessonService(self.user, self.vocab_list)
+        self.today = timezone.localdate()
+
+    def next_review(self, word):
+        return Progress.objects.get(user=self.user, word=word).next_review
+
+    def test_intervals_grow_with_correct_answers(self):
+        word = self.words[0]
+        for count, days in enumerate(REVIEW_INTERVALS[:3], start=1):
+            self.service.update_progress(word, True)
+            self.assertEqual(self.next_review(word), self.today + timedelta(days=days))
+
+        self.service.update_progress(word, False)
+        self.assertEqual(self.next_review(word), self.today)
+
+    def test_reviewing_a_learned_word_keeps_its_learned_day(self):
+        learned_on = self.today - timedelta(days=10)
+        for word in self.words:
+            Progress.objects.create(user=self.user, word=word, correct_count=LEARNED_THRESHOLD,
+                                    last_correct=learned_on, next_review=self.today)
+        summary = list_progress.get_summaries(self.user, [self.vocab_list.pk])[self.vocab_list.pk]
+        unlocks_on = summary.unlocks_on
+        self.assertEqual(unlocks_on, learned_on + timedelta(days=LOCK_DAYS))
+
+        review = ReviewService(self.user)
+        review.update_progress(self.words[0], True)
+        review.record_answers({self.words[1].pk: True})
+
+        progress = Progress.objects.get(user=self.user, word=self.words[0])
+        self.assertEqual((progress.correct_count, progress.last_correct), (LEARNED_THRESHOLD + 1, learned_on))
+        self.assertEqual(Progress.objects.get(user=self.user, word=self.words[1]).last_correct, learned_on)
+        self.assertGreater(progress.next_review, self.today)
+        summary = UserListProgress.objects.get(user=self.user, vocab_list=self.vocab_list)
+        self.assertEqual((summary.last_learned, summary.unlocks_on), (learned_on, unlocks_on))
+        self.assertEqual(DashboardService(self.user).get_today_progress(), 0)
+
+    def test_review_draws_due_words_of_active_lists(self):
+        overdue, due, later = self.words
+        Progress.objects.create(user=self.user, word=overdue, next_review=self.today - timedelta(days=3))
+        Progress.objects.create(user=self.user, word=due, next_review=self.today)
+        Progress.objects.create(user=self.user, word=later, next_review=self.today + timedelta(days=1))
+        review = ReviewService(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(review.get_word_ids(), [overdue.pk, due.pk])
+
+        self.user.active_lists.remove(self.vocab_list)
+        self.assertEqual(review.get_word_ids(), [])
+
+
+class LessonStateTests(LearnerTestCase):
+    word_count = 12
+    word_format = 'wort{i:02d}'
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        distractors.invalidate()
+
+    def test_ids_round_trip(self):
+        ids = [7, 8, 9, 3, 100000, 1]
+        self.assertEqual(lesson_state.decode_ids(lesson_state.encode_ids(ids)), ids)
+        # consecutive pks take one byte each (301 bytes, base64 encoded)
+        self.assertEqual(len(lesson_state.encode_ids(range(1000, 1300))), 402)
+
+    def test_tampered_state_is_ignored(self):
+        value = LessonState(self.vocab_list.pk, [1, 2, 3]).dumps()
+        self.assertEqual(LessonState.loads(value).ids, [1, 2, 3])
+        self.assertIsNone(LessonState.loads(value[:-1] + ('A' if value[-1] != 'A' else 'B')))
+
+    def test_select_options_are_stable_without_storing_them(self):
+        url = reverse('lesson_select', args=[self.vocab_list.pk])
+        first = self.client.get(url, {'word': 2}).context['options']
+        self.assertEqual(self.client.get(url, {'word': 2}).context['options'], first)
+
+        correct = next(i for i, option in enumerate(first) if option['correct'])
+        response = self.client.post(url, {'word_index': 2, 'word_id': self.words[2].pk, 'action': 'check', 'answer': correct})
+        self.assertEqual(response.context['feedback_class'], 'correct')
+        self.assertFalse([key for key in self.client.session.keys() if key.startswith('options_')])
+
+    def test_session_size_does_not_grow_with_lessons(self):
+        session = self.client.session
+        session['lesson_words_1_1'] = [1, 2, 3]
+        session['options_0'] = [{'text': 'x', 'correct': True}]
+        session.save()
+        keys = set(session.keys()) - {'lesson_words_1_1', 'options_0'}
+        sizes = set()
+        for index in range(len(self.words)):
+            self.client.get(reverse('lesson_select', args=[self.vocab_list.pk]), {'word': index})
+            self.client.get(reverse('lesson_input', args=[self.vocab_list.pk]), {'word': index})
+            self.assertEqual(set(self.client.session.keys()), keys | {lesson_state.SESSION_KEY})
+            sizes.add(len(self.client.session[lesson_state.SESSION_KEY]))
+        # only the cursor changes, from one digit to two
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_answer_from_a_stale_form_is_not_recorded(self):
+        url = reverse('lesson_input', args=[self.vocab_list.pk])
+        self.client.get(url, {'word': 3})
+        # another tab starts a lesson over a different list, and the first word gets learned
+        other = VocabularyList.objects.create(name='Other', level=self.vocab_list.level)
+        Word.objects.create(word='anders', translation='other', vocab_list=other)
+        self.client.get(reverse('lesson_input', args=[other.pk]))
+        Progress.objects.create(user=self.user, word=self.words[0], correct_count=LEARNED_THRESHOLD)
+
+        # the first tab answers wort03; in the rebuilt lesson index 3 is wort04
+        form = {'word_index': 3, 'word_id': self.words[3].pk, 'action': 'check', 'answer': 'word3'}
+        response = self.client.post(url, form)
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertFalse(Progress.objects.filter(word__in=self.words[3:5]).exists())
+
+        # posted for the word now at that index, the answer counts
+        response = self.client.post(url, dict(form, word_index=2))
+        self.assertEqual(response.context['feedback_class'], 'correct')
+        self.assertEqual(Progress.objects.get(user=self.user, word=self.words[3]).correct_count, 1)
+
+    def test_lesson_resumes_at_the_cursor(self):
+        url = reverse('lesson_input', args=[self.vocab_list.pk])
+        self.client.get(url, {'word': 5})
+        self.assertEqual(self.client.get(url).context['current_word'], 6)
+        # finishing the lesson clears the state
+        last = len(self.words) - 1
+        self.client.post(url, {'word_index': last, 'word_id': self.words[last].pk, 'action': 'next'})
+        self.assertNotIn(lesson_state.SESSION_KEY, self.client.session)
+
+
+class LessonRoundTests(LearnerTestCase):
+    word_count = 12
+    word_format = 'wort{i:02d}'
+    translation_format = 'Word{i}'
+
+    def setUp(self):
+        self.url = reverse('lesson_round_api', args=[self.vocab_list.pk])
+        self.client.force_login(self.user)
+        distractors.invalidate()
+
+    def post(self, answers):
+        return self.client.post(self.url, json.dumps({'answers': answers}), content_type='application/json')
+
+    def test_round_carries_digests_not_translations(self):
+        page = self.client.get(reverse('lesson_round', args=[self.vocab_list.pk]), {'mode': 'select'})
+        self.assertContains(page, f'data-api-url="{self.url}"')
+
+        data = self.client.get(self.url, {'mode': 'select', 'size': 5}).json()
+        self.assertEqual([question['id'] for question in data['words']], [word.pk for word in self.words[:5]])
+        self.assertEqual(data['total'], 12)
+        self.assertNotIn('Word0', json.dumps({k: v for k, v in data['words'][0].items() if k != 'options'}))
+
+        question = data['words'][0]
+        self.assertEqual(question['digest'], rounds.answer_digest(data['salt'], question['id'], ' word0 '))
+        # the options lesson_select shows for the same word
+        state = LessonState.loads(self.client.session[lesson_state.SESSION_KEY])
+        options = LessonService(self.user, self.vocab_list).get_options(self.words[0], rng=state.rng(self.words[0].pk))
+        self.assertEqual(question['options'], [option['text'] for option in options])
+
+    def test_answers_are_applied_in_one_request(self):
+        data = self.client.get(self.url, {'size': 3}).json()
+        first, second, third = data['words']
+        Progress.objects.create(user=self.user, word_id=first['id'], correct_count=LEARNED_THRESHOLD - 1)
+
+        response = self.post([
+            {'word': first['id'], 'answer': 'word0'},
+            {'word': second['id'], 'answer': 'wrong'},
+            {'word': third['id'], 'answer': 'Word2 '},
+            # not part of the lesson
+            {'word': 10 ** 6, 'answer': 'x'},
+        ])
+        data = response.json()
+        self.assertEqual([(r['id'], r['correct']) for r in data['results']],
+                         [(first['id'], True), (second['id'], False), (third['id'], True)])
+        self.assertEqual((data['cursor'], data['finished']), (3, False))
+
+        counts = dict(Progress.objects.filter(user=self.user).values_list('word_id', 'correct_count'))
+        self.assertEqual(counts, {first['id']: LEARNED_THRESHOLD, second['id']: 0, third['id']: 1})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.progress_total, 2)
+        summary = list_progress.get_summaries(self.user, [self.vocab_list.pk])[self.vocab_list.pk]
+        self.assertEqual((summary.learned_words, summary.in_progress_words), (1, 1))
+
+        # the same number of queries for a round of 1 and of 8 answers
+        translations = {word.pk: word.translation for word in self.words}
+        query_counts = []
+        for size in (1, 8):
+            data = self.client.get(self.url, {'size': size}).json()
+            with CaptureQueriesContext(connection) as queries:
+                self.post([{'word': q['id'], 'answer': translations[q['id']]} for q in data['words']])
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertNotIn(lesson_state.SESSION_KEY, self.client.session)
+
+    def test_only_answers_for_the_served_round_count(self):
+        first_round = self.client.get(self.url, {'size': 2}).json()['words']
+        last = self.words[-1]
+        response = self.post([
+            {'word': first_round[0]['id'], 'answer': 'word0'},
+            # a word of the lesson that was not served yet
+            {'word': last.pk, 'answer': last.translation},
+        ])
+        self.assertEqual([r['id'] for r in response.json()['results']], [first_round[0]['id']])
+        self.assertEqual(response.json()['cursor'], 1)
+        self.assertFalse(Progress.objects.filter(word=last).exists())
+
+        # replaying the same POST records nothing again
+        response = self.post([{'word': first_round[0]['id'], 'answer': 'word0'}])
+        self.assertEqual(response.json()['results'], [])
+        self.assertEqual(Progress.objects.get(user=self.user, word_id=first_round[0]['id']).correct_count, 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.progress_total, 1)
+
+    def test_malformed_answers_are_rejected(self):
+        self.client.get(self.url)
+        for body in ('not json', json.dumps({'answers': [{'word': 'x'}]}), json.dumps([])):
+            response = self.client.post(self.url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Progress.objects.exists())
@@ -5,5 +5,10 @@ from lessons import views
 urlpatterns = [
     path('input/<int:pk>/', views.lesson_input, name="lesson_input"),
     path('select/<int:pk>/', views.lesson_select, name="lesson_select"),
+    path('review/', views.lesson_review, name="lesson_review"),
+    path('round/<int:pk>/', views.lesson_round, name="lesson_round"),
+    path('round/<int:pk>/api/', views.lesson_round_api, name="lesson_round_api"),
+    path('review/round/', views.review_round, name="review_round"),
+    path('review/round/api/', views.review_round_api, name="review_round_api"),
 
 ]
\ No newline at end of file
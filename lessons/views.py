@@ -1,41 +1,69 @@
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
 
 from vocab.models import VocabularyList
-from .lesson_service import LessonService, get_session_key, clamp_index
+from . import lesson_state, rounds
+from .lesson_service import LessonService, ReviewService, clamp_index
+from .lesson_state import LessonState
 
 
-def _get_lesson_words(request, service, vocab_list, session_key):
+def _get_lesson_words(request, service, scope):
     """
-    Get or initialize the word list for a lesson session.
-    Returns (words_list, total_words) or (None, 0) if no words.
+    Get or initialize the lesson state and its words.
+    Returns (state, words_list, total_words); total_words is 0 if no words.
     """
-    # Initialize session on first GET
-    if request.method != "POST" and session_key not in request.session:
-        request.session[session_key] = [w.pk for w in service.get_words()]
-
-    ids = request.session.get(session_key)
-    if not ids:
-        ids = [w.pk for w in service.get_words()]
-        request.session[session_key] = ids
+    state = lesson_state.load(request.session, scope)
+    if state is None or not state.ids:
+        state = LessonState(scope, service.get_word_ids())
+        lesson_state.save(request.session, state)
 
     # Fetch words preserving order
-    in_bulk = vocab_list.words.filter(pk__in=ids).in_bulk()
-    words_now = [in_bulk[i] for i in ids if i in in_bulk]
+    in_bulk = service.words_by_pk(state.ids)
+    words_now = [in_bulk[i] for i in state.ids if i in in_bulk]
     total_words = len(words_now)
 
     # Attempt rebuild if empty
     if total_words == 0:
-        rebuilt_ids = [w.pk for w in service.get_words()]
+        rebuilt_ids = service.get_word_ids()
         if rebuilt_ids:
-            request.session[session_key] = rebuilt_ids
-            in_bulk = vocab_list.words.filter(pk__in=rebuilt_ids).in_bulk()
+            state = LessonState(scope, rebuilt_ids)
+            lesson_state.save(request.session, state)
+            in_bulk = service.words_by_pk(rebuilt_ids)
             words_now = [in_bulk[i] for i in rebuilt_ids if i in in_bulk]
             total_words = len(words_now)
 
-    return words_now, total_words
+    return state, words_now, total_words
+
+
+def _posted_word_index(request, words_now):
+    """
+    Index of the word a lesson form answers, or None if the form no longer
+    matches the lesson (e.g. another tab started a different lesson since),
+    so an answer is never recorded on a word the user did not see.
+    """
+    try:
+        index = int(request.POST.get("word_index", ""))
+        word_pk = int(request.POST.get("word_id", ""))
+    except ValueError:
+        return None
+    if 0 <= index < len(words_now) and words_now[index].pk == word_pk:
+        return index
+    return None
+
+
+def _move_cursor(request, state, index):
+    """Remember the current word, so the lesson resumes there."""
+    if state.cursor != index:
+        state.cursor = index
+        lesson_state.save(request.session, state)
 
 
-def _handle_lesson_navigation(request, action, current_index, total_words, session_key):
+def _handle_lesson_navigation(request, action, current_index, total_words):
     """
     Handle skip/next navigation actions.
     Returns redirect URL or None if lesson should finish.
@@ -50,8 +78,7 @@ def _handle_lesson_navigation(request, action, current_index, total_words, sessi
         next_index = current_index + 1
 
     if next_index >= total_words:
-        if session_key in request.session:
-            del request.session[session_key]
+        lesson_state.clear(request.session)
         return None  # Signal to finish lesson
 
     if next_index < 0:
@@ -62,21 +89,32 @@ def _handle_lesson_navigation(request, action, current_index, total_words, sessi
 def lesson_input(request, pk):
     vocab_list = get_object_or_404(VocabularyList, pk=pk)
     service = LessonService(request.user, vocab_list)
-    session_key = get_session_key(request.user.pk, pk)
+    return _input_lesson(request, service, scope=pk)
+
+
+@login_required
+def lesson_review(request):
+    """Input-mode lesson over the words due for review across all active lists."""
+    service = ReviewService(request.user)
+    return _input_lesson(request, service, scope="review")
 
-    if request.method == "POST":
-        requested_index = int(request.POST.get("word_index", 0))
-    else:
-        requested_index = int(request.GET.get("word", 0))
 
-    words_now, total_words = _get_lesson_words(request, service, vocab_list, session_key)
+def _input_lesson(request, service, scope):
+    state, words_now, total_words = _get_lesson_words(request, service, scope)
 
     if total_words == 0:
-        if session_key in request.session:
-            del request.session[session_key]
+        lesson_state.clear(request.session)
         return render(request, "lessons/finished.html")
 
+    if request.method == "POST":
+        requested_index = _posted_word_index(request, words_now)
+        if requested_index is None:
+            return redirect(request.path)
+    else:
+        requested_index = int(request.GET.get("word", state.cursor))
+
     current_index = clamp_index(requested_index, total_words)
+    _move_cursor(request, state, current_index)
     word = words_now[current_index]
 
     if not word:
@@ -125,7 +163,7 @@ def lesson_input(request, pk):
                 service.update_progress(word, False)
 
         elif action in ("skip", "next"):
-            nav_url = _handle_lesson_navigation(request, action, current_index, total_words, session_key)
+            nav_url = _handle_lesson_navigation(request, action, current_index, total_words)
             if nav_url is None:
                 return render(request, "lessons/finished.html")
             return redirect(nav_url)
@@ -136,31 +174,28 @@ def lesson_input(request, pk):
 def lesson_select(request, pk):
     vocab_list = get_object_or_404(VocabularyList, pk=pk)
     service = LessonService(request.user, vocab_list)
-    session_key = get_session_key(request.user.pk, pk)
-
-    if request.method == "POST":
-        requested_index = int(request.POST.get("word_index", request.GET.get("word", 0)))
-    else:
-        requested_index = int(request.GET.get("word", 0))
-
-    words_now, total_words = _get_lesson_words(request, service, vocab_list, session_key)
+    state, words_now, total_words = _get_lesson_words(request, service, scope=pk)
 
     if total_words == 0:
-        if session_key in request.session:
-            del request.session[session_key]
+        lesson_state.clear(request.session)
         return render(request, "lessons/finished.html")
 
+    if request.method == "POST":
+        requested_index = _posted_word_index(request, words_now)
+        if requested_index is None:
+            return redirect(request.path)
+    else:
+        requested_index = int(request.GET.get("word", state.cursor))
+
     current_index = clamp_index(requested_index, total_words)
+    _move_cursor(request, state, current_index)
     word = words_now[current_index]
 
     if not word:
         return render(request, "lessons/finished.html")
 
-    if request.method == "GET":
-        options = service.get_options(word)
-        request.session[f"options_{current_index}"] = options
-    else:
-        options = request.session.get(f"options_{current_index}", service.get_options(word))
+    # the same options on GET and on the POST that checks the answer
+    options = service.get_options(word, rng=state.rng(word.pk))
 
     feedback = None
     feedback_class = ""
@@ -207,7 +242,7 @@ def lesson_select(request, pk):
                         feedback_class = "incorrect"
                         service.update_progress(word, False)
         elif action in ("skip", "next"):
-            nav_url = _handle_lesson_navigation(request, action, current_index, total_words, session_key)
+            nav_url = _handle_lesson_navigation(request, action, current_index, total_words)
             if nav_url is None:
                 return render(request, "lessons/finished.html")
             return redirect(nav_url)
@@ -224,4 +259,105 @@ def lesson_select(request, pk):
         "checked": checked,
     }
 
-    return render(request, "lessons/select.html", context)
\ No newline at end of file
+    return render(request, "lessons/select.html", context)
+
+
+@login_required
+def lesson_round(request, pk):
+    """Lesson page that fetches a round of questions and checks the answers in the browser."""
+    vocab_list = get_object_or_404(VocabularyList, pk=pk)
+    mode = "select" if request.GET.get("mode") == "select" else "input"
+    return render(request, "lessons/round.html", {
+        "vocab_list": vocab_list,
+        "mode": mode,
+        "api_url": reverse("lesson_round_api", args=[pk]),
+    })
+
+
+@login_required
+def review_round(request):
+    return render(request, "lessons/round.html", {
+        "mode": "input",
+        "api_url": reverse("review_round_api"),
+    })
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def lesson_round_api(request, pk):
+    """
+    GET: the next round of the lesson as JSON, ?mode=input|select[&size=<n>].
+    POST: the answers of a round, {"answers": [{"word": <pk>, "answer": <text>}]}.
+    """
+    vocab_list = get_object_or_404(VocabularyList, pk=pk)
+    service = LessonService(request.user, vocab_list)
+    mode = "select" if request.GET.get("mode") == "select" else "input"
+    return _round_api(request, service, pk, mode)
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def review_round_api(request):
+    """The same as lesson_round_api for the review lesson (input mode only)."""
+    return _round_api(request, ReviewService(request.user), "review", "input")
+
+
+def _round_api(request, service, scope, mode):
+    state = lesson_state.load(request.session, scope)
+    if state is None or not state.ids:
+        state = LessonState(scope, service.get_word_ids())
+        lesson_state.save(request.session, state)
+
+    if request.method == "POST":
+        try:
+            answers = rounds.parse_answers(json.loads(request.body))
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        return _apply_round(request, service, state, answers)
+
+    try:
+        size = max(1, min(int(request.GET.get("size", rounds.ROUND_SIZE)), rounds.MAX_ROUND_SIZE))
+    except ValueError:
+        size = rounds.ROUND_SIZE
+    ids = state.ids[state.cursor:state.cursor + size]
+    if state.round_size != len(ids):
+        state.round_size = len(ids)
+        lesson_state.save(request.session, state)
+    in_bulk = service.words_by_pk(ids)
+    words = [in_bulk[i] for i in ids if i in in_bulk]
+    return JsonResponse(rounds.build(service, state, words, mode))
+
+
+def _apply_round(request, service, state, answers):
+    """
+    Check the posted answers, record them and move the cursor past the round.
+    Only words of the round served last count: answers for other words of the
+    lesson, or a replay of a POST that was already applied, are ignored.
+    """
+    position = {
+        pk: index
+        for index, pk in enumerate(state.ids[state.cursor:state.cursor + state.round_size], start=state.cursor)
+    }
+    words = service.words_by_pk([pk for pk in answers if pk in position])
+    results = {pk: rounds.is_correct(word, answers[pk]) for pk, word in words.items()}
+    service.record_answers(results)
+
+    if results:
+        state.cursor = max(position[pk] for pk in results) + 1
+        # the next round has to be fetched first
+        state.round_size = 0
+    finished = state.cursor >= len(state.ids)
+    if finished:
+        lesson_state.clear(request.session)
+    else:
+        lesson_state.save(request.session, state)
+
+    return JsonResponse({
+        "results": [
+            {"id": pk, "correct": results[pk], "translation": words[pk].translation}
+            for pk in sorted(results, key=position.get)
+        ],
+        "cursor": state.cursor,
+        "total": len(state.ids),
+        "finished": finished,
+    })
@@ -8,3 +8,9 @@ LOCK_DAYS = 7
 
 # SVG circle circumference for progress indicators
 PROGRESS_CIRCLE_CIRCUMFERENCE = 283.0
+
+# Spaced repetition: days until the next review after the 1st, 2nd, 3rd, ... correct answer
+REVIEW_INTERVALS = (1, 2, 4, 7, 15, 30, 60)
+
+# Maximum number of due words drawn into one review session
+REVIEW_SESSION_SIZE = 50
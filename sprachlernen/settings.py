@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -121,7 +122,51 @@ WSGI_APPLICATION = 'sprachlernen.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SPRACHLERNEN_DB_NAME', BASE_DIR / 'db.sqlite3'),
+    }
+}
+
+# Database profile, selected with the SPRACHLERNEN_DB_PROFILE environment variable:
+# "default" keeps SQLite's defaults, "production" is tuned for concurrent requests:
+# - WAL lets readers run while an answer is written; synchronous=NORMAL is safe with WAL
+# - busy_timeout waits up to 20 s for the write lock instead of failing with "database is locked"
+# - IMMEDIATE transactions take the write lock at BEGIN, so two transactions that
+#   read first can no longer deadlock when both try to write
+# - connections are kept for CONN_MAX_AGE seconds and checked before reuse
+# Compare both with: python manage.py stress_answers
+DB_PROFILE = os.environ.get('SPRACHLERNEN_DB_PROFILE', 'default')
+
+SQLITE_PRODUCTION_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=20000',
+    'PRAGMA mmap_size=134217728',  # 128 MiB
+    'PRAGMA cache_size=-20000',    # ~20 MB page cache per connection
+]
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': '; '.join(SQLITE_PRODUCTION_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# The local-memory cache is per process: with several worker processes use a
+# shared backend (e.g. Redis) so invalidations such as the nav_lists version reach all of them.
+# Management commands (import_vocab) also run in a process of their own; the
+# in-process registries that depend on such versions (vocab.reference, ...)
+# therefore also expire after a short MAX_AGE, which bounds how long a change
+# stays invisible without a shared cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
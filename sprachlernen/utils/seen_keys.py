@@ -0,0 +1,58 @@
+"""
+The (level code, word) keys of the entries imported in one run.
+
+The keys are kept in a temporary table of the importer's connection instead
+of a Python set, so memory use does not grow with the sources. Rows added
+inside a file's transaction disappear with it if that file fails, so the
+table always holds the keys of the files that were imported.
+"""
+from django.db import connection
+
+from vocab.models import LanguageLevel, Word
+
+TABLE = 'vocab_import_seen_keys'
+
+
+class SeenKeys:
+    def __init__(self):
+        level_type = LanguageLevel._meta.get_field('code').db_type(connection)
+        word_type = Word._meta.get_field('word').db_type(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {TABLE} (level_code {level_type} NOT NULL, '
+                f'word {word_type} NOT NULL, PRIMARY KEY (level_code, word))'
+            )
+
+    def add(self, keys):
+        """Add ``keys`` (distinct (level code, word) pairs) and return those that were already seen."""
+        wanted = {}
+        for level_code, word_text in keys:
+            wanted.setdefault(level_code, []).append(word_text)
+        seen = set()
+        with connection.cursor() as cursor:
+            for level_code, words in wanted.items():
+                placeholders = ', '.join(['%s'] * len(words))
+                cursor.execute(
+                    f'SELECT level_code, word FROM {TABLE} WHERE level_code = %s AND word IN ({placeholders})',
+                    [level_code, *words],
+                )
+                seen.update(cursor.fetchall())
+            new_keys = [key for key in keys if key not in seen]
+            if new_keys:
+                cursor.executemany(f'INSERT INTO {TABLE} (level_code, word) VALUES (%s, %s)', new_keys)
+        return seen
+
+    def missing(self, vocab_list, level_code):
+        """Pks of the words of ``vocab_list`` that were not seen under ``level_code``."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM {Word._meta.db_table} AS w WHERE w.vocab_list_id = %s AND NOT EXISTS '
+                f'(SELECT 1 FROM {TABLE} AS s WHERE s.level_code = %s AND s.word = w.word)',
+                [vocab_list.pk, level_code],
+            )
+            return [pk for pk, in cursor.fetchall()]
+
+    def drop(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
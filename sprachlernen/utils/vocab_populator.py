@@ -1,16 +1,40 @@
-import json
 import os
-from vocab.models import Language, LanguageLevel, VocabularyList, Word
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+
+from sprachlernen.utils.seen_keys import SeenKeys
+from sprachlernen.utils.vocab_reader import VocabFormatError, VocabReader, content_hash, read_file
+from vocab import deletion, reference, search
+from vocab.models import Language, LanguageLevel, ListMembership, VocabularyList, Word
+from vocab.signals import word_list_changed, words_edited
+
+# Number of items read from the file and written per bulk_create / bulk_update round
+IMPORT_BATCH_SIZE = 500
+
 
 class VocabPopulator:
     """
-    A utility class to handle importing vocabulary and potentially other 
+    A utility class to handle importing vocabulary and potentially other
     learning resources into the database.
     """
 
-    def __init__(self, stdout=None, stderr=None):
+    def __init__(self, stdout=None, stderr=None, quiet=False, batch_size=IMPORT_BATCH_SIZE,
+                 dry_run=False, delete_missing=False):
         self.stdout = stdout
         self.stderr = stderr
+        # quiet mode prints one summary line instead of a line per word
+        self.quiet = quiet
+        self.batch_size = batch_size
+        # dry_run computes the diff against the database without writing anything
+        self.dry_run = dry_run
+        # delete_missing removes words of the imported lists that are in none of the sources
+        self.delete_missing = delete_missing
+        # one summary dict per imported file, see _result()
+        self.results = []
+        # words missing from the sources of the last run (removed with delete_missing)
+        self.removed = 0
 
     def log(self, message, style='info'):
         if self.stdout:
@@ -23,6 +47,11 @@ class VocabPopulator:
         else:
             print(f"[{style.upper()}] {message}")
 
+    def verbose(self, message, style='info'):
+        """Log a detail line that is suppressed in quiet mode."""
+        if not self.quiet:
+            self.log(message, style=style)
+
     def error(self, message):
         if self.stderr:
             self.stderr.write(message)
@@ -35,132 +64,311 @@ class VocabPopulator:
         Supports two formats:
         1. Simple format: { "words": [ { "word": "...", ... } ] }
         2. Open CEFR format: { "levels": { "A1": { "vocabulary": [ { "lemma": "...", ... } ] } } }
+
+        The file is streamed and written in batches of ``batch_size`` items, so
+        memory use stays flat whatever the file size. All batches share one
+        transaction, so a failing import leaves the database untouched.
+        Words whose content hash matches the stored one are not written again.
+        """
+        return self.import_files([json_file_path])
+
+    def import_files(self, json_file_paths, jobs=1):
+        """
+        Import several files as one run, parsing them in a pool of ``jobs`` processes.
+
+        Only this process writes to the database (SQLite allows a single writer),
+        so parsed files are written one after another, in the given order, while
+        the pool keeps parsing the remaining ones. With ``jobs=1`` every file is
+        streamed instead, which keeps memory flat for very large files.
+
+        An entry that appears more than once in the run (same level and word, in
+        one file or several) is imported from its first occurrence. Words of the
+        touched system lists that are in none of the files are counted, and with
+        ``delete_missing`` removed, once every file was imported.
         """
-        if not os.path.exists(json_file_path):
-            self.error(f"File not found: {json_file_path}")
+        self._seen = SeenKeys()
+        self._touched_lists = {}  # level code -> system list written by a successful file
+        self.removed = 0
+        try:
+            if jobs <= 1 or len(json_file_paths) <= 1:
+                ok = all([self._import_path(path) for path in json_file_paths])
+            else:
+                ok = self._import_parallel(json_file_paths, jobs)
+            if ok and (self.delete_missing or self.dry_run):
+                self._remove_missing()
+            elif self.delete_missing:
+                # the words of a file that failed would look missing
+                self.error("Missing words were not removed because not every file was imported.")
+        finally:
+            self._seen.drop()
+        return ok
+
+    def _import_path(self, path):
+        if not os.path.exists(path):
+            self.error(f"File not found: {path}")
+            self.results.append(self._result(path, ok=False))
             return False
+        return self._import_source(VocabReader(path))
+
+    def _import_parallel(self, json_file_paths, jobs):
+        ok = True
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = []
+            for path in json_file_paths:
+                if os.path.exists(path):
+                    futures.append((path, pool.submit(read_file, path)))
+                else:
+                    futures.append((path, None))
+
+            for path, future in futures:
+                if future is None:
+                    self.error(f"File not found: {path}")
+                    self.results.append(self._result(path, ok=False))
+                    ok = False
+                    continue
+                try:
+                    parsed = future.result()
+                except (OSError, VocabFormatError) as e:
+                    self.error(f"Failed to parse JSON ({path}): {e}")
+                    self.results.append(self._result(path, ok=False))
+                    ok = False
+                    continue
+                ok = self._import_source(parsed) and ok
+        return ok
 
+    def _import_source(self, source):
+        """Write the items of a VocabReader or ParsedFile in a single transaction."""
+        started = time.perf_counter()
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with transaction.atomic():
+                stats = self._write_batches(source)
+        except VocabFormatError as e:
+            self.error(f"Failed to parse JSON ({source.path}): {e}")
+            self.results.append(self._result(source.path, ok=False))
+            return False
         except Exception as e:
-            self.error(f"Failed to parse JSON: {e}")
+            self.error(f"Import failed, no changes were saved ({source.path}): {e}")
+            self.results.append(self._result(source.path, ok=False))
             return False
+        elapsed = time.perf_counter() - started
+
+        lists = stats.pop('lists')
+        shared_list_ids = stats.pop('shared_list_ids')
+        self._touched_lists.update(lists)
+        list_ids = {vocab_list.pk for vocab_list in lists.values() if vocab_list is not None}
+        # bulk writes bypass the model signals, so tell caches about the changed lists
+        if not self.dry_run and stats['new']:
+            word_list_changed.send(sender=self.__class__, vocab_list_ids=sorted(list_ids))
+        if not self.dry_run and stats['updated']:
+            words_edited.send(sender=self.__class__, vocab_list_ids=sorted(list_ids | shared_list_ids))
 
-        # Ensure German language exists (Default for this project)
-        german, _ = Language.objects.get_or_create(name="German")
-
-        imported_count = 0
-        updated_count = 0
-
-        # Check format
-        if 'levels' in data:
-            # Handle Open CEFR format
-            self.log("Detected Open CEFR format.", style='info')
-            for level_code, level_data in data['levels'].items():
-                vocab_list_name = f'System List {level_code}'
-                
-                # Get or create Level
-                level_obj, _ = LanguageLevel.objects.get_or_create(
-                    code=level_code,
-                    defaults={'description': f'Language Level {level_code}'}
-                )
-
-                # Get or create Vocabulary List
-                vocab_list, _ = VocabularyList.objects.get_or_create(
-                    name=vocab_list_name,
-                    level=level_obj,
-                    language=german,
-                    is_system=True
-                )
-
-                vocabulary = level_data.get('vocabulary', [])
-                for item in vocabulary:
-                    word_text = item.get('lemma')
-                    pos = item.get('pos')
-                    example = item.get('example_usage')
-                    
-                    # Extract translation (assuming English for now, taking first sense)
-                    translations = item.get('translations', {})
-                    en_translations = translations.get('en', [])
-                    translation_text = en_translations[0].get('text') if en_translations else ""
-                    
-                    # details/metadata
-                    details = {
-                        'id': item.get('id'),
-                        'gender': item.get('gender'),
-                        'pos': pos
-                    }
-
-                    # Create or update Word
-                    word_obj, created = Word.objects.update_or_create(
-                        word=word_text,
-                        vocab_list=vocab_list,
-                        defaults={
-                            'translation': translation_text,
-                            'word_type': pos,
-                            'example': example,
-                            'metadata': details
-                        }
-                    )
-
-                    if created:
-                        imported_count += 1
-                        self.log(f"Imported: {word_text}", style='success')
-                    else:
-                        updated_count += 1
-                        self.log(f"Updated: {word_text}", style='warning')
+        # a streamed file is parsed while it is written; a pre-parsed one was parsed elsewhere
+        parse_seconds = stats.pop('parse_seconds')
+        result = self._result(
+            source.path, ok=True,
+            parse_seconds=getattr(source, 'parse_seconds', 0.0) + parse_seconds,
+            write_seconds=elapsed - parse_seconds,
+            **stats
+        )
+        self.results.append(result)
 
+        rows = result['rows']
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        duplicates = f", Duplicates skipped: {stats['duplicates']}" if stats['duplicates'] else ""
+        if self.dry_run:
+            self.log(
+                f"Dry run, nothing was written. (New: {stats['new']}, Changed: {stats['updated']}, "
+                f"Unchanged: {stats['unchanged']}{duplicates})",
+                style='info'
+            )
         else:
-            # Handle original simple format
-            self.log("Detected simple format.", style='info')
-            words_data = data.get('words', [])
-            
-            for entry in words_data:
-                word_text = entry.get('word')
-                translation = entry.get('translation')
-                details = entry.get('details', {})
-                level_code = details.get('level', 'A1')
-                word_type = details.get('type')
-                example = entry.get('example')
-                example_translation = entry.get('example_translation')
-
-                # Get or create Level
-                level, _ = LanguageLevel.objects.get_or_create(
-                    code=level_code,
-                    defaults={'description': f'Language Level {level_code}'}
-                )
-
-                # Get or create Vocabulary List for this level
-                vocab_list, _ = VocabularyList.objects.get_or_create(
-                    name=f'System List {level_code}',
-                    level=level,
-                    language=german,
-                    is_system=True
-                )
-
-                # Create or update Word
-                word_obj, created = Word.objects.update_or_create(
-                    word=word_text,
-                    vocab_list=vocab_list,
-                    defaults={
-                        'translation': translation,
-                        'word_type': word_type,
-                        'example': example,
-                        'example_translation': example_translation,
-                        'metadata': details
-                    }
-                )
-
-                if created:
-                    imported_count += 1
-                    self.log(f"Imported: {word_text}", style='success')
+            self.log(
+                f"Import process completed. (New: {stats['new']}, Updated: {stats['updated']}, "
+                f"Unchanged: {stats['unchanged']}{duplicates}) {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)",
+                style='info'
+            )
+        return True
+
+    def _result(self, path, ok, new=0, updated=0, unchanged=0, duplicates=0,
+                parse_seconds=0.0, write_seconds=0.0):
+        return {
+            'path': path,
+            'ok': ok,
+            'new': new,
+            'updated': updated,
+            'unchanged': unchanged,
+            'duplicates': duplicates,
+            'rows': new + updated + unchanged,
+            'parse_seconds': parse_seconds,
+            'write_seconds': write_seconds,
+        }
+
+    def _write_batches(self, source):
+        german = reference.get_language("German")
+        if german is None and not self.dry_run:
+            # Ensure German language exists (Default for this project)
+            german, _ = Language.objects.get_or_create(name="German")
+
+        lists = {}  # level code -> VocabularyList (None in a dry run if it does not exist yet)
+        shared_list_ids = set()  # custom lists containing updated words
+        stats = {'new': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0}
+        parse_seconds = 0.0
+
+        batches = source.batches(self.batch_size)
+        while True:
+            read_started = time.perf_counter()
+            batch = next(batches, None)
+            parse_seconds += time.perf_counter() - read_started
+            if batch is None:
+                break
+
+            if not any(stats.values()):
+                if source.format == 'cefr':
+                    self.verbose("Detected Open CEFR format.", style='info')
                 else:
-                    updated_count += 1
-                    self.log(f"Updated: {word_text}", style='warning')
+                    self.verbose("Detected simple format.", style='info')
+            for level_code, word_text, _ in batch:
+                if level_code not in lists:
+                    lists[level_code] = self._get_system_list(level_code, german)
+            self._write_batch(batch, lists, stats, shared_list_ids)
 
-        self.log(f"Import process completed. (New: {imported_count}, Updated: {updated_count})", style='info')
-        return True
+        stats['parse_seconds'] = parse_seconds
+        stats['lists'] = lists
+        stats['shared_list_ids'] = shared_list_ids
+        return stats
+
+    def _write_batch(self, batch, lists, stats, shared_list_ids):
+        """
+        Write one batch with a fixed number of queries: one (pk, word, hash)
+        lookup per list touched by the batch, then at most one bulk_create (and
+        one for the list memberships) and one bulk_update. Rows whose content
+        hash did not change are not written. Custom lists share the system
+        words, so an update reaches them without further writes.
+
+        An entry repeated in the run, in this batch, an earlier one or an
+        earlier file, is skipped: the first occurrence wins, so re-importing the
+        sources finds every word unchanged instead of alternating between the copies.
+        """
+        entries = {}
+        repeated = []
+        for level_code, word_text, fields in batch:
+            key = (level_code, word_text)
+            if key in entries:
+                repeated.append(key)
+            else:
+                entries[key] = fields
+        repeated.extend(self._seen.add(list(entries)))
+        for key in repeated:
+            entries.pop(key, None)
+            stats['duplicates'] += 1
+            self.verbose(f"Skipped duplicate: {key[1]} ({key[0]})", style='warning')
+        batch = entries
+
+        wanted = {}
+        for level_code, word_text in batch:
+            if lists[level_code] is not None:
+                wanted.setdefault(level_code, set()).add(word_text)
+
+        existing = {}  # (level code, word text) -> (pk, content_hash)
+        for level_code, words in wanted.items():
+            rows = (Word.objects
+                    .filter(vocab_list=lists[level_code], word__in=words)
+                    .values_list('word', 'pk', 'content_hash'))
+            for word_text, pk, stored_hash in rows:
+                existing[(level_code, word_text)] = (pk, stored_hash)
+
+        to_create = []
+        to_update = []
+        update_fields = {'content_hash'}
+
+        for key, fields in batch.items():
+            level_code, word_text = key
+            digest = content_hash(fields)
+
+            if key not in existing:
+                to_create.append(Word(word=word_text, vocab_list=lists[level_code], content_hash=digest, **fields))
+                stats['new'] += 1
+                self.verbose(f"Imported: {word_text}", style='success')
+                continue
+
+            pk, stored_hash = existing[key]
+            if stored_hash == digest:
+                stats['unchanged'] += 1
+                continue
+            to_update.append(Word(pk=pk, content_hash=digest, **fields))
+            update_fields.update(fields)
+            stats['updated'] += 1
+            self.verbose(f"Updated: {word_text}", style='warning')
+
+        if self.dry_run:
+            return
+        if to_create:
+            Word.objects.bulk_create(to_create, batch_size=self.batch_size)
+            # bulk_create bypasses Word.save, which adds a word to its list
+            ListMembership.objects.bulk_create(
+                [ListMembership(vocab_list=word.vocab_list, word=word) for word in to_create],
+                batch_size=self.batch_size,
+            )
+        if to_update:
+            Word.objects.bulk_update(to_update, sorted(update_fields), batch_size=self.batch_size)
+            shared_list_ids.update(
+                ListMembership.objects
+                .filter(word_id__in=[word.pk for word in to_update], vocab_list__is_system=False)
+                .values_list('vocab_list_id', flat=True)
+            )
+        # bulk writes bypass the Word signals that keep the search index in sync
+        search.index_words([word.pk for word in to_create + to_update])
+
+    def _remove_missing(self):
+        """
+        Delete (or without delete_missing or in a dry run, count) the words of the
+        system lists touched by the run that are in none of its sources, with
+        set-based deletes.
+        """
+        vocab_list_ids = set()
+        with transaction.atomic():
+            for level_code, vocab_list in self._touched_lists.items():
+                if vocab_list is None:
+                    continue
+                missing = self._seen.missing(vocab_list, level_code)
+                self.removed += len(missing)
+                if self.delete_missing and not self.dry_run and missing:
+                    vocab_list_ids.add(vocab_list.pk)
+                    for start in range(0, len(missing), self.batch_size):
+                        chunk = missing[start:start + self.batch_size]
+                        vocab_list_ids.update(deletion.delete_words(Word.objects.filter(pk__in=chunk)))
+
+        if vocab_list_ids:
+            word_list_changed.send(sender=self.__class__, vocab_list_ids=sorted(vocab_list_ids))
+        if self.dry_run:
+            action = 'would be removed' if self.delete_missing else 'are missing from the sources'
+            self.log(f"Dry run: {self.removed} words of the imported lists {action}.", style='info')
+        elif self.delete_missing:
+            self.log(f"Removed {self.removed} words that are in none of the sources.", style='info')
+
+    def _get_system_list(self, level_code, language):
+        # levels and system lists are read from the reference-data registry;
+        # only rows that do not exist yet cost a query
+        name = f'System List {level_code}'
+        level = reference.get_level(level_code)
+        if level is not None:
+            vocab_list = reference.get_system_list(name, level, language)
+            if vocab_list is not None or self.dry_run:
+                return vocab_list
+        elif self.dry_run:
+            return None
+        else:
+            level, _ = LanguageLevel.objects.get_or_create(
+                code=level_code,
+                defaults={'description': f'Language Level {level_code}'}
+            )
+        vocab_list, _ = VocabularyList.objects.get_or_create(
+            name=name,
+            level=level,
+            language=language,
+            is_system=True
+        )
+        return vocab_list
 
     def import_grammar(self, data):
         """Placeholder for future imports for learning grammar"""
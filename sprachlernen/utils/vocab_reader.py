@@ -0,0 +1,250 @@
+"""
+Incremental reader for vocabulary JSON files.
+
+Only one vocabulary item is decoded at a time, so memory use does not depend
+on the size of the file. This module has no Django imports and can be used
+outside of a configured project.
+"""
+import hashlib
+import json
+import time
+from itertools import islice
+
+# Number of characters read from the file at once
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\r\n'
+
+
+class VocabFormatError(ValueError):
+    """The file is not valid JSON (or not UTF-8) or is not shaped like a vocabulary file."""
+
+
+def normalize_cefr_item(level_code, item):
+    """Turn an Open CEFR vocabulary entry into a (level_code, word, fields) tuple."""
+    pos = item.get('pos')
+
+    # Extract translation (assuming English for now, taking first sense)
+    translations = item.get('translations', {})
+    en_translations = translations.get('en', [])
+    translation_text = en_translations[0].get('text') if en_translations else ""
+
+    # details/metadata
+    details = {
+        'id': item.get('id'),
+        'gender': item.get('gender'),
+        'pos': pos
+    }
+
+    # example_translation is not part of this format and is left untouched
+    return level_code, item.get('lemma'), {
+        'translation': translation_text,
+        'word_type': pos,
+        'example': item.get('example_usage'),
+        'metadata': details,
+    }
+
+
+def normalize_simple_entry(entry):
+    """Turn a simple format entry into a (level_code, word, fields) tuple."""
+    details = entry.get('details', {})
+    return details.get('level', 'A1'), entry.get('word'), {
+        'translation': entry.get('translation'),
+        'word_type': details.get('type'),
+        'example': entry.get('example'),
+        'example_translation': entry.get('example_translation'),
+        'metadata': details,
+    }
+
+
+def content_hash(fields):
+    """
+    Stable fingerprint of the imported fields of a word.
+
+    Keys are sorted so the digest only changes when a value changes.
+    """
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _JsonStream:
+    """
+    Minimal pull parser: walks objects and arrays structurally and hands
+    every leaf value to json's C decoder.
+    """
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        # read at least as much as is buffered so a large value is re-scanned only log(n) times
+        try:
+            chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        except UnicodeDecodeError as e:
+            raise VocabFormatError(str(e)) from e
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise VocabFormatError(f"Expected '{char}' but found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise VocabFormatError(str(e)) from e
+            # a number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def members(self):
+        """Yield the keys of an object; the caller must consume each value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def elements(self):
+        """Yield once per array element; the caller must consume each value."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+class VocabReader:
+    """
+    Iterates over the vocabulary items of a JSON file one at a time.
+
+    Supports the same formats as VocabPopulator: items are read from
+    levels.<code>.vocabulary[] (Open CEFR) or from words[] (simple format).
+    ``format`` is set to 'cefr' or 'simple' once the matching key is reached.
+
+    The Open CEFR format takes precedence if a file has both keys, wherever
+    they are in the document. words[] is therefore skipped on a first pass
+    and only read, in a second pass over the file, if no levels key followed.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.format = None
+
+    def __iter__(self):
+        self.format = None
+        has_words = yield from self._read(read_words=False)
+        if has_words and self.format is None:
+            yield from self._read(read_words=True)
+
+    def _read(self, read_words):
+        """Yield the items of one pass; returns whether the document has a words key."""
+        has_words = False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            stream = _JsonStream(f, self.chunk_size)
+            for key in stream.members():
+                if key == 'levels':
+                    self.format = 'cefr'
+                    for level_code in stream.members():
+                        for level_key in stream.members():
+                            if level_key != 'vocabulary':
+                                stream.value()
+                                continue
+                            for _ in stream.elements():
+                                yield normalize_cefr_item(level_code, stream.value())
+                elif key == 'words':
+                    has_words = True
+                    if read_words:
+                        self.format = 'simple'
+                    # skipped entries are decoded one at a time, so memory stays flat
+                    for _ in stream.elements():
+                        entry = stream.value()
+                        if read_words:
+                            yield normalize_simple_entry(entry)
+                else:
+                    stream.value()
+            if stream.peek():
+                raise VocabFormatError("Unexpected data after the end of the document")
+        return has_words
+
+    def batches(self, size):
+        """Yield lists of at most ``size`` items."""
+        return _batched(self, size)
+
+
+class ParsedFile:
+    """
+    All items of one file, parsed up front by read_file().
+
+    Offers the same ``format``/``batches()`` interface as VocabReader so the
+    populator can write it the same way.
+    """
+
+    def __init__(self, path, format, items, parse_seconds):
+        self.path = path
+        self.format = format
+        self.items = items
+        self.parse_seconds = parse_seconds
+
+    def batches(self, size):
+        return _batched(self.items, size)
+
+
+def read_file(path, chunk_size=CHUNK_SIZE):
+    """Parse and normalize a whole file. Used as a process pool task."""
+    started = time.perf_counter()
+    reader = VocabReader(path, chunk_size)
+    items = list(reader)
+    return ParsedFile(path, reader.format, items, time.perf_counter() - started)
+
+
+def _batched(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
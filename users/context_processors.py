@@ -2,17 +2,51 @@
 Context processor so social account providers are always available in templates.
 Fixes "no providers" when get_providers tag doesn't see the right site/request.
 """
+import time
 
+from django.contrib.sites.shortcuts import get_current_site
+from django.utils.functional import SimpleLazyObject
 
-def socialaccount_providers(request):
+# Seconds the provider list of a site is reused; SocialApp changes clear it at once (see signals.py)
+PROVIDERS_TTL = 300
+
+# site pk -> (expires at, [(provider class, app)]); provider objects hold the request,
+# so only the classes and apps are memoized and the providers are rebuilt per request
+_providers = {}
+
+
+def invalidate_providers():
+    _providers.clear()
+
+
+def _list_provider_apps(request):
+    from allauth.socialaccount.adapter import get_adapter
+    adapter = get_adapter()
+    providers = adapter.list_providers(request)
+    providers = [
+        p for p in providers
+        if (not getattr(p, "uses_apps", True) or not (getattr(p, "app", None) and p.app and p.app.settings.get("hidden")))
+    ]
+    return [(type(p), p.app) for p in sorted(providers, key=lambda p: p.name)]
+
+
+def get_providers(request):
+    site_pk = get_current_site(request).pk
+    now = time.monotonic()
+    cached = _providers.get(site_pk)
+    if cached is None or cached[0] <= now:
+        cached = (now + PROVIDERS_TTL, _list_provider_apps(request))
+        _providers[site_pk] = cached
+    return [provider_class(request=request, app=app) for provider_class, app in cached[1]]
+
+
+def _get_providers_or_empty(request):
     try:
-        from allauth.socialaccount.adapter import get_adapter
-        adapter = get_adapter()
-        providers = adapter.list_providers(request)
-        providers = [
-            p for p in providers
-            if (not getattr(p, "uses_apps", True) or not (getattr(p, "app", None) and p.app and p.app.settings.get("hidden")))
-        ]
-        return {"socialaccount_providers": sorted(providers, key=lambda p: p.name)}
+        return get_providers(request)
     except Exception:
-        return {"socialaccount_providers": []}
+        return []
+
+
+def socialaccount_providers(request):
+    # lazy: only templates that render the login buttons build the list
+    return {"socialaccount_providers": SimpleLazyObject(lambda: _get_providers_or_empty(request))}
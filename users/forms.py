@@ -2,6 +2,8 @@ from allauth.account.forms import SignupForm
 from django import forms
 from django.contrib.auth import get_user_model
 
+from vocab.forms import LevelChoiceField
+
 User = get_user_model()
 
 class CustomSignupForm(SignupForm):
@@ -41,6 +43,7 @@ class ProfileUpdateForm(forms.ModelForm):
             'level': 'Level',
             'daily_target': 'Words per day'
         }
+        field_classes = {'level': LevelChoiceField}
 
     def clean(self):
         cleaned_data = super().clean()
@@ -1,9 +1,9 @@
 from django.utils import timezone
-from django.db.models import Max
-from datetime import timedelta
 
-from sprachlernen.constants import LEARNED_THRESHOLD, LOCK_DAYS
+from lessons.lesson_service import ReviewService
+from sprachlernen.constants import LEARNED_THRESHOLD
 from vocab.models import Progress
+from vocab.services import ListMetricsService
 
 
 class DashboardService:
@@ -11,65 +11,9 @@ class DashboardService:
         self.user = user
 
     def get_active_lists_with_progress(self):
-        active_qs = (self.user.active_lists
-                     .all()
-                     .prefetch_related('words'))
-
-        results = []
-        for vlist in active_qs:
-            total_words = vlist.words.count()
-
-            # mastered: words that reached the learned threshold
-            learned_words = Progress.objects.filter(
-                user=self.user,
-                word__vocab_list=vlist,
-                correct_count__gte=LEARNED_THRESHOLD
-            ).count()
-
-            in_progress_words = Progress.objects.filter(
-                user=self.user,
-                word__vocab_list=vlist,
-                correct_count__gt=0,
-                correct_count__lt=LEARNED_THRESHOLD
-            ).count()
-
-            # progress percent shows fraction of words learned (mastered)
-            progress_percent = round((learned_words / total_words) * 100, 1) if total_words > 0 else 0.0
-            is_completed = (0 < total_words == learned_words)
-
-            # determine lock state: if all words learned -> locked until last_learned + LOCK_DAYS
-            is_locked = False
-            unlock_in_days = 0
-            if total_words > 0 and learned_words == total_words:
-                last_learned = Progress.objects.filter(
-                    user=self.user, word__vocab_list=vlist, correct_count__gte=LEARNED_THRESHOLD
-                ).aggregate(max_date=Max('last_correct'))['max_date']
-                if last_learned:
-                    next_available = last_learned + timedelta(days=LOCK_DAYS)
-                    today = timezone.localdate()
-                    delta = (next_available - today).days
-                    if delta > 0:
-                        is_locked = True
-                        unlock_in_days = delta
-
-            # compute SVG circle dash offset using same circumference as other views
-            CIRC = 283.0
-            progress_offset = max(0.0, min(CIRC, CIRC - (CIRC * (progress_percent / 100.0))))
-
-            results.append({
-                "id": vlist.id,
-                "name": vlist.name,
-                "total_words": total_words,
-                "learned_words": learned_words,
-                "in_progress_words": in_progress_words,
-                "progress_percent": progress_percent,
-                "progress_offset": progress_offset,
-                "is_completed": is_completed,
-                "is_locked": is_locked,
-                "unlock_in_days": unlock_in_days,
-            })
-
-        return results
+        # the dashboard shows its own "learned today" total, so the per-list count is skipped
+        active_qs = self.user.active_lists.order_by('pk')
+        return ListMetricsService(self.user).for_lists(active_qs, learned_today=False)
 
     def get_today_progress(self):
         today = timezone.localdate()
@@ -80,6 +24,10 @@ class DashboardService:
             correct_count__gte=LEARNED_THRESHOLD,
         ).count()
 
+    def get_due_review_count(self):
+        # words of the active lists whose spaced repetition review is due
+        return ReviewService(self.user).get_due_progress().count()
+
     def get_daily_goal(self):
         return self.user.daily_target
 
@@ -121,4 +69,5 @@ class DashboardService:
             "lists_percent": lists_percent,
             "lists_total": lists_total,
             "total_points": int(self.user.progress_total),
+            "due_reviews": self.get_due_review_count(),
         }
@@ -0,0 +1,11 @@
+from allauth.socialaccount.models import SocialApp
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .context_processors import invalidate_providers
+
+
+@receiver([post_save, post_delete], sender=SocialApp)
+@receiver(m2m_changed, sender=SocialApp.sites.through)
+def social_apps_changed(sender, **kwargs):
+    invalidate_providers()
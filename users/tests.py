@@ -1,3 +1,120 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from allauth.socialaccount.models import SocialApp
+from django.contrib.sites.models import Site
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from sprachlernen.constants import LEARNED_THRESHOLD, LOCK_DAYS
+from vocab.models import LanguageLevel, Progress, VocabularyList, Word
+from vocab.testing import LearnerTestCase, add_words
+from . import context_processors
+from .models import User
+from .services import DashboardService
+
+
+class DashboardServiceTests(LearnerTestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+
+    def add_list(self, name, size):
+        vocab_list = VocabularyList.objects.create(name=name, level=self.level)
+        words = add_words(vocab_list, size, word=f'{name}-{{i}}')
+        self.user.active_lists.add(vocab_list)
+        return vocab_list, words
+
+    def test_list_metrics(self):
+        _, words = self.add_list('Food', 4)
+        Progress.objects.create(user=self.user, word=words[0], correct_count=LEARNED_THRESHOLD, last_correct=self.today)
+        Progress.objects.create(user=self.user, word=words[1], correct_count=1)
+        Progress.objects.create(user=self.user, word=words[2], correct_count=0)
+        # progress of other users is ignored
+        other = User.objects.create_user(username='other', password='pw')
+        Progress.objects.create(user=other, word=words[3], correct_count=LEARNED_THRESHOLD)
+
+        [metrics] = DashboardService(self.user).get_active_lists_with_progress()
+
+        self.assertEqual(metrics['total_words'], 4)
+        self.assertEqual(metrics['learned_words'], 1)
+        self.assertEqual(metrics['in_progress_words'], 1)
+        self.assertEqual(metrics['progress_percent'], 25.0)
+        self.assertFalse(metrics['is_completed'])
+
+    def test_completed_list_is_locked(self):
+        _, words = self.add_list('Travel', 2)
+        for word in words:
+            Progress.objects.create(
+                user=self.user, word=word, correct_count=LEARNED_THRESHOLD, last_correct=self.today - timedelta(days=2)
+            )
+
+        [metrics] = DashboardService(self.user).get_active_lists_with_progress()
+
+        self.assertTrue(metrics['is_completed'])
+        self.assertTrue(metrics['is_locked'])
+        self.assertEqual(metrics['unlock_in_days'], LOCK_DAYS - 2)
+
+    def test_dashboard_query_count_does_not_depend_on_list_count(self):
+        for count in (1, 6):
+            while self.user.active_lists.count() < count:
+                _, words = self.add_list(f'List {self.user.active_lists.count()}', 10)
+                Progress.objects.create(user=self.user, word=words[0], correct_count=LEARNED_THRESHOLD)
+            # the first visit builds the missing list summary rows
+            DashboardService(self.user).get_dashboard_context()
+            # active lists with their summary rows, words learned today, due reviews
+            with self.assertNumQueries(3):
+                context = DashboardService(self.user).get_dashboard_context()
+            self.assertEqual(context['lists_total'], count)
+
+
+class SocialAccountProvidersTests(TestCase):
+    def setUp(self):
+        self.site = Site.objects.create(domain='testserver', name='testserver')
+        self.request = RequestFactory().get('/')
+        context_processors.invalidate_providers()
+
+    def provider_names(self):
+        return [p.name for p in context_processors.socialaccount_providers(self.request)['socialaccount_providers']]
+
+    def add_app(self):
+        app = SocialApp.objects.create(provider='google', name='Google', client_id='id', secret='secret')
+        app.sites.add(self.site)
+        return app
+
+    def test_providers_are_lazy_and_memoized(self):
+        with override_settings(SITE_ID=self.site.pk):
+            self.add_app()
+            with self.assertNumQueries(0):
+                context_processors.socialaccount_providers(self.request)
+            self.assertEqual(self.provider_names(), ['Google'])
+            with self.assertNumQueries(0):
+                self.assertEqual(self.provider_names(), ['Google'])
+
+    def test_social_app_changes_clear_the_memo(self):
+        with override_settings(SITE_ID=self.site.pk):
+            self.assertEqual(self.provider_names(), [])
+            app = self.add_app()
+            self.assertEqual(self.provider_names(), ['Google'])
+            app.delete()
+            self.assertEqual(self.provider_names(), [])
+
+
+class DeleteAccountTests(TestCase):
+    def test_account_is_deleted_with_lists_and_progress(self):
+        user = User.objects.create_user(username='learner', password='pw')
+        level = LanguageLevel.objects.create(code='A1', description='Level A1')
+        system_list = VocabularyList.objects.create(name='System List A1', level=level)
+        word = Word.objects.create(word='Haus', translation='house', vocab_list=system_list)
+        custom = VocabularyList.objects.create(name='Mine', level=level, created_by=user, is_system=False)
+        custom.words.add(word)
+        user.active_lists.add(custom)
+        Progress.objects.create(user=user, word=word, correct_count=1)
+
+        self.client.force_login(user)
+        response = self.client.post(reverse('users:delete_account'))
+        self.assertRedirects(response, reverse('account_login'), fetch_redirect_response=False)
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertFalse(VocabularyList.objects.filter(pk=custom.pk).exists())
+        self.assertFalse(Progress.objects.exists())
+        self.assertTrue(Word.objects.filter(pk=word.pk).exists())
+        self.assertNotIn('_auth_user_id', self.client.session)
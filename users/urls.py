@@ -7,6 +7,7 @@ urlpatterns = [
     path('', views.DashboardView.as_view(), name='dashboard'),
     path('dashboard/', views.DashboardView.as_view(), name='dashboard-alt'),
     path('profile/', views.ProfileView.as_view(), name='profile'),
+    path('profile/delete/', views.DeleteAccountView.as_view(), name='delete_account'),
 ]
 
 
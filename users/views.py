@@ -1,8 +1,13 @@
+from django.contrib.auth import logout
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.shortcuts import redirect
+from django.views import View
 from django.views.generic import TemplateView, UpdateView
 from django.urls import reverse_lazy
 from django.contrib import messages
 
+from vocab.deletion import delete_user
+
 from .services import DashboardService
 from .forms import ProfileUpdateForm
 from .models import User
@@ -31,3 +36,12 @@ class ProfileView(LoginRequiredMixin, UpdateView):
     def form_valid(self, form):
         messages.success(self.request, 'Your profile has been updated successfully.')
         return super().form_valid(form)
+
+
+class DeleteAccountView(LoginRequiredMixin, View):
+    def post(self, request):
+        user = request.user
+        logout(request)
+        delete_user(user)
+        messages.success(request, 'Your account has been deleted.')
+        return redirect('account_login')
@@ -1,6 +1,15 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.html import format_html
+
+from . import search
+from .deletion import delete_lists
 from .models import Language, LanguageLevel, VocabularyList, Word, Progress
 
+# most words an admin search returns, best matches first
+ADMIN_SEARCH_LIMIT = 500
+
 @admin.register(Language)
 class LanguageAdmin(admin.ModelAdmin):
     list_display = ('name',)
@@ -11,31 +20,86 @@ class LanguageLevelAdmin(admin.ModelAdmin):
     list_display = ('code', 'description')
 
 
-class WordInline(admin.TabularInline):
-    model = Word
-    extra = 0
-    fields = ('word', 'translation', 'word_type')
-
-
 @admin.register(VocabularyList)
 class VocabularyListAdmin(admin.ModelAdmin):
     list_display = ('name', 'level', 'language', 'is_system', 'created_by', 'word_count')
     list_filter = ('level', 'is_system')
-    inlines = [WordInline]
+    # User.__str__ shows the level
+    list_select_related = ('level', 'language', 'created_by', 'created_by__level')
+    raw_id_fields = ('created_by',)
+    # the words are browsed in the paginated Word changelist instead of an inline form per word
+    readonly_fields = ('words_link',)
+    actions = ['delete_lists']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(word_total=Count('memberships'))
+
+    @admin.display(description='Words', ordering='word_total')
     def word_count(self, obj):
-        return obj.words.count()
-    word_count.short_description = 'Words'
+        return obj.word_total
+
+    @admin.display(description='Words')
+    def words_link(self, obj):
+        if obj.pk is None:
+            return '-'
+        url = reverse('admin:vocab_word_changelist') + f'?lists__id__exact={obj.pk}'
+        return format_html('<a href="{}">{} words</a>', url, obj.word_total)
+
+    def get_actions(self, request):
+        # the default action collects every word and Progress row for its confirmation page
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Delete selected lists with their words and progress', permissions=['delete'])
+    def delete_lists(self, request, queryset):
+        count = delete_lists(queryset)
+        self.message_user(request, f'Deleted {count} lists.', messages.SUCCESS)
+
+    def get_deleted_objects(self, objs, request):
+        # the delete page lists the counts instead of every dependent row
+        objs = list(objs)
+        model_count = {
+            VocabularyList._meta.verbose_name_plural: len(objs),
+            'list words': sum(obj.words.count() for obj in objs),
+        }
+        return [str(obj) for obj in objs], model_count, set(), []
+
+    def delete_model(self, request, obj):
+        delete_lists([obj])
+
+    def delete_queryset(self, request, queryset):
+        delete_lists(queryset)
 
 
 @admin.register(Word)
 class WordAdmin(admin.ModelAdmin):
     list_display = ('word', 'translation', 'word_type', 'vocab_list')
     list_filter = ('vocab_list__level', 'word_type')
+    list_select_related = ('vocab_list',)
     search_fields = ('word', 'translation')
+    raw_id_fields = ('vocab_list',)
+    # no second COUNT(*) over all words on every filtered page
+    show_full_result_count = False
+
+    def lookup_allowed(self, lookup, value, request=None):
+        # the words of one list, linked from VocabularyListAdmin
+        return lookup == 'lists__id__exact' or super().lookup_allowed(lookup, value, request)
+
+    def get_search_results(self, request, queryset, search_term):
+        # full-text search instead of a LIKE scan over every word
+        if not search_term:
+            return queryset, False
+        word_ids = search.search_word_ids(search_term, limit=ADMIN_SEARCH_LIMIT, within=queryset)
+        return queryset.filter(pk__in=word_ids), False
 
 
 @admin.register(Progress)
 class ProgressAdmin(admin.ModelAdmin):
     list_display = ('user', 'word', 'correct_count', 'last_correct', 'next_review')
-    list_filter = ('user', 'level')
+    # a user filter would list every user in the sidebar; search by username instead
+    list_filter = ('level',)
+    list_select_related = ('user', 'user__level', 'word')
+    search_fields = ('^user__username',)
+    raw_id_fields = ('user', 'word')
+    show_full_result_count = False
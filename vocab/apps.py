@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class VocabConfig(AppConfig):
     name = 'vocab'
+
+    def ready(self):
+        from . import signals  # noqa: F401
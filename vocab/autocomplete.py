@@ -0,0 +1,119 @@
+"""
+In-process prefix index of the system list words, one per (language, level),
+for the word picker of the create-list page.
+
+Each index is a sorted array of (normalized key, word pk) built from both the
+word and its translation; a prefix lookup is a bisect to the first key >= the
+prefix followed by a scan while keys still start with it. Indexes are built on
+first use and dropped when the version number in the Django cache changes
+(system list words changed, end of import_vocab), like the reference data,
+or after MAX_AGE seconds when the version change cannot reach this process.
+"""
+import bisect
+import threading
+import time
+import unicodedata
+
+from django.core.cache import cache
+
+from .models import Word
+
+VERSION_KEY = 'autocomplete:version'
+
+AUTOCOMPLETE_LIMIT = 20
+
+# Seconds an index is reused without a version change
+MAX_AGE = 300
+
+_lock = threading.Lock()
+_version = None
+# (language pk, level pk) -> PrefixIndex
+_indexes = {}
+
+
+def normalize(text):
+    """Casefold and strip diacritics, so 'uber' finds 'Über'."""
+    decomposed = unicodedata.normalize('NFKD', (text or '').casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class PrefixIndex:
+    def __init__(self, language_id, level_id):
+        self.expires_at = time.monotonic() + MAX_AGE
+        rows = (Word.objects
+                .filter(vocab_list__is_system=True, vocab_list__language_id=language_id, vocab_list__level_id=level_id)
+                .values_list('pk', 'word', 'translation', 'word_type', 'vocab_list_id'))
+        # pk -> (word, translation, word type, list pk)
+        self.words = {}
+        entries = []
+        for pk, word, translation, word_type, list_id in rows:
+            self.words[pk] = (word, translation, word_type, list_id)
+            entries.append((normalize(word), pk))
+            entries.append((normalize(translation), pk))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.pks = [pk for _, pk in entries]
+
+    def __len__(self):
+        return len(self.words)
+
+    def lookup(self, prefix, limit=AUTOCOMPLETE_LIMIT, list_id=None):
+        """Pks of up to ``limit`` words whose word or translation starts with ``prefix``, in key order."""
+        prefix = normalize(prefix)
+        found = []
+        seen = set()
+        for i in range(bisect.bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[i].startswith(prefix):
+                break
+            pk = self.pks[i]
+            if pk in seen or (list_id is not None and self.words[pk][3] != list_id):
+                continue
+            seen.add(pk)
+            found.append(pk)
+            if len(found) >= limit:
+                break
+        return found
+
+
+def get_index(language_id, level_id):
+    global _version
+    version = cache.get_or_set(VERSION_KEY, 1, timeout=None)
+    key = (language_id, level_id)
+    with _lock:
+        if _version != version:
+            _indexes.clear()
+            _version = version
+        index = _indexes.get(key)
+    if index is None or index.expires_at <= time.monotonic():
+        # built outside the lock; two threads may build the same index once
+        index = PrefixIndex(language_id, level_id)
+        with _lock:
+            if _version == version:
+                _indexes[key] = index
+    return index
+
+
+def invalidate():
+    """Rebuild the indexes in every process on next access."""
+    global _version
+    with _lock:
+        _indexes.clear()
+        _version = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+
+
+def complete(vocab_list, prefix, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Up to ``limit`` words of ``vocab_list`` starting with ``prefix``, as
+    (pk, word, translation, word type) tuples. System lists are answered from
+    the index; custom lists are small and queried directly.
+    """
+    if vocab_list.is_system:
+        index = get_index(vocab_list.language_id, vocab_list.level_id)
+        return [(pk, *index.words[pk][:3]) for pk in index.lookup(prefix, limit, list_id=vocab_list.pk)]
+    prefix = normalize(prefix)
+    rows = vocab_list.words.order_by('word', 'pk').values_list('pk', 'word', 'translation', 'word_type')
+    return [row for row in rows if normalize(row[1]).startswith(prefix) or normalize(row[2]).startswith(prefix)][:limit]
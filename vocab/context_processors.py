@@ -1,11 +1,52 @@
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from . import reference
 from .models import VocabularyList
 
+# Bumped by the VocabularyList/LanguageLevel signals (see signals.py); old entries just expire.
+# System lists come from the reference-data registry.
+NAV_VERSION_KEY = 'nav_lists:version'
+NAV_CACHE_TIMEOUT = 60 * 60
+
+
+def get_nav_version():
+    return cache.get_or_set(NAV_VERSION_KEY, 1, timeout=None)
+
+
+def bump_nav_version():
+    """Invalidate all cached navigation lists."""
+    try:
+        cache.incr(NAV_VERSION_KEY)
+    except ValueError:
+        # the key was evicted; any new value invalidates the old entries
+        cache.set(NAV_VERSION_KEY, 2, timeout=None)
+
+
+def _cached_lists(key, queryset):
+    key = f'{key}:v{get_nav_version()}'
+    lists = cache.get(key)
+    if lists is None:
+        lists = list(queryset.select_related('level'))
+        cache.set(key, lists, NAV_CACHE_TIMEOUT)
+    return lists
+
+
+def get_custom_lists(user):
+    """Custom lists of one user for the navigation."""
+    return _cached_lists(
+        f'nav_lists:custom:{user.pk}', VocabularyList.objects.filter(is_system=False, created_by=user)
+    )
+
+
 def nav_lists(request):
-    system_lists = VocabularyList.objects.filter(is_system=True)
+    # lazy so pages that do not render the navigation never touch the cache or the database
+    system_lists = SimpleLazyObject(reference.get_system_lists)
     custom_lists = []
     if request.user.is_authenticated:
-        custom_lists = VocabularyList.objects.filter(is_system=False, created_by=request.user)
-    
+        user = request.user
+        custom_lists = SimpleLazyObject(lambda: get_custom_lists(user))
+
     return {
         'system_lists': system_lists,
         'custom_lists': custom_lists,
@@ -0,0 +1,73 @@
+"""
+Bulk deletion of vocabulary lists and user accounts.
+
+Model.delete() lets Django's collector load every dependent row (words,
+memberships, Progress, summaries, active list links) into memory and send a
+signal per row. Here the dependent tables are emptied first with set-based
+DELETE statements in dependency order, words in chunks of CHUNK_SIZE, and only
+then is the list or user itself deleted with delete(), which has nothing left
+to collect and still sends its own signals. Caches are told about the changed
+lists once, with ``word_list_changed``.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import search
+from .models import ListMembership, Progress, UserListProgress, VocabularyList, Word
+from .signals import word_list_changed
+
+CHUNK_SIZE = 1000
+
+
+def _raw_delete(queryset):
+    """DELETE the rows of ``queryset`` in one statement, without collecting or signals."""
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_words(queryset):
+    """
+    Delete the words of ``queryset`` with their Progress and memberships, chunk
+    by chunk. Returns the pks of the lists that contained them.
+    """
+    vocab_list_ids = set()
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:CHUNK_SIZE])
+        if not pks:
+            return vocab_list_ids
+        memberships = ListMembership.objects.filter(word_id__in=pks)
+        vocab_list_ids.update(memberships.values_list('vocab_list_id', flat=True).distinct())
+        _raw_delete(Progress.objects.filter(word_id__in=pks))
+        _raw_delete(memberships)
+        _raw_delete(Word.objects.filter(pk__in=pks))
+        search.remove_words(pks)
+
+
+def delete_lists(vocab_lists):
+    """Delete the given lists (a queryset or iterable) and everything depending on them; returns the number."""
+    vocab_lists = list(vocab_lists)
+    if not vocab_lists:
+        return 0
+    active_lists = get_user_model().active_lists.through
+    # delete() clears the pks
+    changed = {vocab_list.pk for vocab_list in vocab_lists}
+    with transaction.atomic():
+        for vocab_list in vocab_lists:
+            # words owned by the list: edited copies, or the words of a system list
+            changed |= delete_words(Word.objects.filter(vocab_list=vocab_list))
+            _raw_delete(ListMembership.objects.filter(vocab_list=vocab_list))
+            _raw_delete(UserListProgress.objects.filter(vocab_list=vocab_list))
+            _raw_delete(active_lists.objects.filter(vocabularylist=vocab_list))
+            vocab_list.delete()
+        word_list_changed.send(sender=VocabularyList, vocab_list_ids=changed)
+    return len(vocab_lists)
+
+
+def delete_user(user):
+    """Delete a user account with the user's custom lists, Progress and summaries."""
+    active_lists = get_user_model().active_lists.through
+    with transaction.atomic():
+        delete_lists(VocabularyList.objects.filter(created_by=user, is_system=False))
+        _raw_delete(Progress.objects.filter(user=user))
+        _raw_delete(UserListProgress.objects.filter(user=user))
+        _raw_delete(active_lists.objects.filter(user=user))
+        user.delete()
@@ -0,0 +1,21 @@
+from django import forms
+from django.forms.models import ModelChoiceIterator
+
+from . import reference
+
+
+class LevelChoiceIterator(ModelChoiceIterator):
+    """Choices from the reference-data registry instead of a query per render."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for level in reference.get_levels():
+            yield self.choice(level)
+
+    def __len__(self):
+        return len(reference.get_levels()) + (1 if self.field.empty_label is not None else 0)
+
+
+class LevelChoiceField(forms.ModelChoiceField):
+    iterator = LevelChoiceIterator
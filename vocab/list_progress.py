@@ -0,0 +1,232 @@
+"""
+Maintenance of the UserListProgress summary rows.
+
+Rows are created from Progress the first time a list is looked at
+(``get_summaries`` / ``with_summaries``), adjusted by a single UPDATE on every
+correct answer (``record_correct_answer``, ``record_correct_answers`` for a
+batch) and recomputed for whole lists when words are added or removed
+(``refresh_lists``). The ``rebuild_list_progress``
+management command recomputes or verifies everything from scratch.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Exists, F, FilteredRelation, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from sprachlernen.constants import LEARNED_THRESHOLD, LOCK_DAYS
+from .models import ListMembership, Progress, UserListProgress
+
+SUMMARY_FIELDS = ('total_words', 'learned_words', 'in_progress_words', 'last_learned', 'unlocks_on')
+
+_LEARNED = Q(correct_count__gte=LEARNED_THRESHOLD)
+_IN_PROGRESS = Q(correct_count__gt=0, correct_count__lt=LEARNED_THRESHOLD)
+
+
+def unlock_date(total_words, learned_words, last_learned):
+    """Day a completed list can be repeated again, None while it is not completed."""
+    if total_words > 0 and learned_words == total_words and last_learned:
+        return last_learned + timedelta(days=LOCK_DAYS)
+    return None
+
+
+def lock_state(unlocks_on, today):
+    """(is_locked, unlock_in_days) of a list on the given day."""
+    if unlocks_on and unlocks_on > today:
+        return True, (unlocks_on - today).days
+    return False, 0
+
+
+def compute(user, vocab_list_ids):
+    """
+    Compute (without saving) the rows of one user for the given lists from
+    Progress with two grouped queries, returned by list pk.
+    """
+    vocab_list_ids = list(vocab_list_ids)
+    totals = dict(
+        ListMembership.objects.filter(vocab_list_id__in=vocab_list_ids)
+        .values('vocab_list_id').annotate(n=Count('pk'))
+        .values_list('vocab_list_id', 'n')
+    )
+    stats = {
+        row['word__memberships__vocab_list_id']: row
+        for row in Progress.objects.filter(user=user, word__memberships__vocab_list_id__in=vocab_list_ids)
+        .values('word__memberships__vocab_list_id')
+        .annotate(
+            learned=Count('pk', filter=_LEARNED),
+            in_progress=Count('pk', filter=_IN_PROGRESS),
+            last_learned=Max('last_correct', filter=_LEARNED),
+        )
+    }
+
+    rows = {}
+    for vocab_list_id in vocab_list_ids:
+        row_stats = stats.get(vocab_list_id, {})
+        total = totals.get(vocab_list_id, 0)
+        learned = row_stats.get('learned', 0)
+        last_learned = row_stats.get('last_learned')
+        rows[vocab_list_id] = UserListProgress(
+            user=user, vocab_list_id=vocab_list_id,
+            total_words=total,
+            learned_words=learned,
+            in_progress_words=row_stats.get('in_progress', 0),
+            last_learned=last_learned,
+            unlocks_on=unlock_date(total, learned, last_learned),
+        )
+    return rows
+
+
+def rebuild(user, vocab_list_ids):
+    """Recompute and store the rows of one user for the given lists, returned by list pk."""
+    rows = compute(user, vocab_list_ids)
+    UserListProgress.objects.bulk_create(
+        rows.values(), update_conflicts=True,
+        unique_fields=['user', 'vocab_list'], update_fields=list(SUMMARY_FIELDS),
+    )
+    return rows
+
+
+def get_summaries(user, vocab_list_ids):
+    """Return {list pk: UserListProgress}, building missing rows on first use."""
+    vocab_list_ids = list(vocab_list_ids)
+    rows = {
+        row.vocab_list_id: row
+        for row in UserListProgress.objects.filter(user=user, vocab_list_id__in=vocab_list_ids)
+    }
+    missing = [pk for pk in vocab_list_ids if pk not in rows]
+    if missing:
+        rows.update(rebuild(user, missing))
+    return rows
+
+
+def with_summaries(queryset, user):
+    """
+    Annotate a VocabularyList queryset with the summary columns of the user
+    (NULL where no row exists yet) in the same query. Use ``fill_summaries``
+    on the evaluated lists to build the missing rows.
+    """
+    return (queryset
+            .annotate(summary=FilteredRelation('progress_summaries', condition=Q(progress_summaries__user=user)))
+            .annotate(summary_id=F('summary__id'), **{field: F(f'summary__{field}') for field in SUMMARY_FIELDS}))
+
+
+def fill_summaries(vocab_lists, user):
+    """Build the rows missing from lists annotated by ``with_summaries``."""
+    vocab_lists = list(vocab_lists)
+    missing = [vlist for vlist in vocab_lists if vlist.summary_id is None]
+    if missing:
+        rows = rebuild(user, [vlist.pk for vlist in missing])
+        for vlist in missing:
+            for field in SUMMARY_FIELDS:
+                setattr(vlist, field, getattr(rows[vlist.pk], field))
+    return vocab_lists
+
+
+def record_correct_answer(user, word, correct_count, today):
+    """
+    Apply one correct answer that moved the word to ``correct_count`` to the
+    user's rows of the lists containing the word (see ``record_correct_answers``).
+    Must run in the transaction that updated Progress; the counters are
+    changed with F() so concurrent answers on the same list add up.
+    """
+    record_correct_answers(user, {word.pk: correct_count}, today)
+
+
+def record_correct_answers(user, correct_counts, today):
+    """
+    Apply correct answers given as {word pk: new correct_count} (one answer
+    per word), with one UPDATE per distinct change instead of one per word.
+    Same transaction requirement as ``record_correct_answer``.
+
+    Every row the user has is kept up to date, including rows of other users'
+    lists (built when the learner viewed such a list, or by the rebuild
+    command); missing rows are only built for system lists and the user's
+    own lists, so a word shared into many custom lists stays cheap to answer.
+    """
+    word_changes = {}  # word pk -> (in progress delta, learned delta, learned)
+    for word_id, correct_count in correct_counts.items():
+        in_progress = learned = 0
+        if correct_count == 1 and LEARNED_THRESHOLD > 1:
+            in_progress += 1
+        if correct_count == LEARNED_THRESHOLD:
+            learned += 1
+            if LEARNED_THRESHOLD > 1:
+                in_progress -= 1
+        # reviews of a learned word (count above the threshold) change nothing
+        if in_progress or learned:
+            word_changes[word_id] = (in_progress, learned, correct_count == LEARNED_THRESHOLD)
+    if not word_changes:
+        return
+
+    list_changes = {}  # list pk -> [in progress delta, learned delta, learned]
+    has_row = UserListProgress.objects.filter(user=user, vocab_list=OuterRef('vocab_list'))
+    memberships = (ListMembership.objects
+                   .filter(Q(vocab_list__is_system=True) | Q(vocab_list__created_by=user) | Exists(has_row),
+                           word_id__in=word_changes)
+                   .values_list('vocab_list_id', 'word_id'))
+    for vocab_list_id, word_id in memberships:
+        in_progress, learned, any_learned = word_changes[word_id]
+        change = list_changes.setdefault(vocab_list_id, [0, 0, False])
+        change[0] += in_progress
+        change[1] += learned
+        change[2] = change[2] or any_learned
+
+    groups = {}  # change -> [list pk]
+    for vocab_list_id, change in list_changes.items():
+        groups.setdefault(tuple(change), []).append(vocab_list_id)
+    missing = []
+    for (in_progress, learned, any_learned), vocab_list_ids in groups.items():
+        changes = {}
+        if in_progress:
+            changes['in_progress_words'] = F('in_progress_words') + in_progress
+        if learned:
+            changes['learned_words'] = F('learned_words') + learned
+        if any_learned:
+            changes['last_learned'] = today
+        if not changes:
+            continue
+        rows = UserListProgress.objects.filter(user=user, vocab_list_id__in=vocab_list_ids)
+        if rows.update(**changes) < len(vocab_list_ids):
+            stored = set(rows.values_list('vocab_list_id', flat=True))
+            missing += [pk for pk in vocab_list_ids if pk not in stored]
+    if missing:
+        # first answer on some of the lists: their new rows already include these answers
+        rebuild(user, missing)
+    learned_lists = [pk for pk, change in list_changes.items() if change[2]]
+    if learned_lists:
+        UserListProgress.objects.filter(
+            user=user, vocab_list_id__in=learned_lists, total_words__gt=0, learned_words=F('total_words'),
+        ).update(unlocks_on=today + timedelta(days=LOCK_DAYS))
+
+
+def refresh_lists(vocab_list_ids):
+    """
+    Recompute all rows of the given lists after words were added or removed,
+    with one set-based UPDATE (correlated subqueries) per list batch.
+    """
+    vocab_list_ids = list(vocab_list_ids)
+    if not vocab_list_ids:
+        return
+
+    def count(condition):
+        subquery = (Progress.objects
+                    .filter(condition, user=OuterRef('user'), word__memberships__vocab_list=OuterRef('vocab_list'))
+                    .values('user').annotate(n=Count('pk')).values('n'))
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+    total = (ListMembership.objects.filter(vocab_list=OuterRef('vocab_list'))
+             .values('vocab_list').annotate(n=Count('pk')).values('n'))
+    last_learned = (Progress.objects
+                    .filter(_LEARNED, user=OuterRef('user'), word__memberships__vocab_list=OuterRef('vocab_list'))
+                    .values('user').annotate(d=Max('last_correct')).values('d'))
+    rows = UserListProgress.objects.filter(vocab_list_id__in=vocab_list_ids)
+    rows.update(
+        total_words=Coalesce(Subquery(total, output_field=IntegerField()), Value(0)),
+        learned_words=count(_LEARNED),
+        in_progress_words=count(_IN_PROGRESS),
+        last_learned=Subquery(last_learned),
+    )
+    # the unlock date depends on the columns written above
+    rows.update(unlocks_on=None)
+    for row in rows.filter(total_words__gt=0, learned_words=F('total_words'), last_learned__isnull=False):
+        row.unlocks_on = unlock_date(row.total_words, row.learned_words, row.last_learned)
+        row.save(update_fields=['unlocks_on'])
@@ -1,12 +1,77 @@
-from django.core.management.base import BaseCommand
-from sprachlernen.utils.vocab_populator import VocabPopulator
+import glob
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from sprachlernen.utils.vocab_populator import IMPORT_BATCH_SIZE, VocabPopulator
+from vocab import autocomplete, reference
 
 class Command(BaseCommand):
-    help = 'Import vocabulary from a JSON file'
+    help = 'Import vocabulary from one or more JSON files (glob patterns are expanded)'
 
     def add_arguments(self, parser):
-        parser.add_argument('json_file', type=str, help='Path to the JSON file')
+        parser.add_argument('json_files', nargs='+', type=str, help='Paths or glob patterns of the JSON files')
+        parser.add_argument(
+            '--quiet', action='store_true',
+            help='Print a single summary line instead of one line per word'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help=f'Number of items read and written per batch (default: {IMPORT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Compare the files with the database and print the counts of new, changed, '
+                 'unchanged and removed words without writing anything'
+        )
+        parser.add_argument(
+            '--delete-missing', action='store_true',
+            help='Delete words of the imported system lists that are in none of the source files'
+        )
+        parser.add_argument(
+            '--jobs', type=int, default=1,
+            help='Number of processes parsing files in parallel (default: 1, every file is streamed with '
+                 'flat memory use). Parallel workers hold a whole parsed file in memory each.'
+        )
 
     def handle(self, *args, **options):
-        populator = VocabPopulator(stdout=self.stdout, stderr=self.stderr)
-        populator.import_from_json(options['json_file'])
+        if options['batch_size'] < 1:
+            raise CommandError(f"--batch-size must be at least 1, got {options['batch_size']}")
+        paths = self.expand_paths(options['json_files'])
+        jobs = max(1, min(options['jobs'], len(paths), os.cpu_count() or 1))
+
+        populator = VocabPopulator(
+            stdout=self.stdout, stderr=self.stderr,
+            quiet=options['quiet'], batch_size=options['batch_size'],
+            dry_run=options['dry_run'], delete_missing=options['delete_missing']
+        )
+        populator.import_files(paths, jobs=jobs)
+        # levels and system lists may have been created; reload them everywhere
+        reference.invalidate()
+        # rebuild the word picker indexes with the imported words
+        autocomplete.invalidate()
+
+        if len(paths) > 1:
+            self.print_timings(populator.results)
+
+    def expand_paths(self, patterns):
+        paths = []
+        for pattern in patterns:
+            matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+            if not matches:
+                self.stderr.write(f"No files match: {pattern}")
+            for path in matches:
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
+    def print_timings(self, results):
+        width = max(len('File'), *(len(r['path']) for r in results))
+        self.stdout.write(f"{'File':<{width}}  {'Parse':>8}  {'Write':>8}  {'Rows':>7}  {'Rows/s':>8}  Status")
+        for r in results:
+            total = r['parse_seconds'] + r['write_seconds']
+            rate = r['rows'] / total if total > 0 else 0.0
+            status = 'ok' if r['ok'] else 'FAILED'
+            self.stdout.write(
+                f"{r['path']:<{width}}  {r['parse_seconds']:>7.2f}s  {r['write_seconds']:>7.2f}s  "
+                f"{r['rows']:>7}  {rate:>8.0f}  {status}"
+            )
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from vocab import list_progress
+from vocab.models import Progress, UserListProgress
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user list progress summaries from Progress, or verify them with --verify'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Compare the stored summaries with freshly computed ones without writing; '
+                 'fails if any row differs'
+        )
+        parser.add_argument('--user', type=str, help='Only handle the user with this username')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User not found: {options['user']}")
+
+        checked = mismatches = 0
+        for user in users.iterator():
+            # every list the user has answered words of, plus the lists that already have a row
+            vocab_list_ids = set(
+                Progress.objects.filter(user=user).values_list('word__memberships__vocab_list_id', flat=True).distinct()
+            )
+            stored = {row.vocab_list_id: row for row in UserListProgress.objects.filter(user=user)}
+            vocab_list_ids.update(stored)
+            if not vocab_list_ids:
+                continue
+
+            if not options['verify']:
+                with transaction.atomic():
+                    list_progress.rebuild(user, vocab_list_ids)
+                checked += len(vocab_list_ids)
+                continue
+
+            for vocab_list_id, expected in list_progress.compute(user, vocab_list_ids).items():
+                checked += 1
+                row = stored.get(vocab_list_id)
+                if row is None:
+                    # missing rows are built on first use, so they are not an error
+                    continue
+                diff = [
+                    f"{field}: stored {getattr(row, field)}, expected {getattr(expected, field)}"
+                    for field in list_progress.SUMMARY_FIELDS
+                    if getattr(row, field) != getattr(expected, field)
+                ]
+                if diff:
+                    mismatches += 1
+                    self.stderr.write(f"{user.username} / list {vocab_list_id}: " + '; '.join(diff))
+
+        if not options['verify']:
+            self.stdout.write(f"Rebuilt {checked} list progress rows.")
+        elif mismatches:
+            raise CommandError(f"{mismatches} of {checked} list progress rows differ, run without --verify to fix them.")
+        else:
+            self.stdout.write(f"Verified {checked} list progress rows, all up to date.")
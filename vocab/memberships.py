@@ -0,0 +1,126 @@
+"""
+Words of custom lists.
+
+Custom lists reference the shared Word rows through ListMembership instead of
+copying them, so a learner's Progress on a word counts in every list that
+contains it. Editing a shared word in a custom list copies it first
+(``edit_word``); the copy replaces the shared word in that list only.
+"""
+import bisect
+
+from django.db import transaction
+
+from .models import ListMembership, Word
+from .signals import word_list_changed
+
+# Word fields a user may change in one of their lists
+EDITABLE_FIELDS = ('word', 'translation', 'word_type', 'example', 'example_translation')
+
+# most ranges accepted in one selection
+MAX_RANGES = 1000
+
+
+def parse_ranges(text):
+    """
+    Parse word pk ranges such as '3-7,12' into sorted, non-overlapping
+    (first, last) pairs. Raises ValueError for malformed input or more than
+    MAX_RANGES ranges.
+    """
+    ranges = []
+    for part in (text or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        first = int(first)
+        last = int(last) if last else first
+        if first > last:
+            raise ValueError(f"Invalid range: {part}")
+        ranges.append((first, last))
+    if len(ranges) > MAX_RANGES:
+        raise ValueError(f"More than {MAX_RANGES} ranges")
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def format_ranges(pks):
+    """The inverse of ``parse_ranges``: [1, 2, 3, 7] -> '1-3,7'."""
+    parts = []
+    for pk in sorted(set(pks)):
+        if parts and parts[-1][1] == pk - 1:
+            parts[-1][1] = pk
+        else:
+            parts.append([pk, pk])
+    return ','.join(str(first) if first == last else f'{first}-{last}' for first, last in parts)
+
+
+def in_ranges(ranges, pk):
+    """Whether ``pk`` is within the sorted, non-overlapping ``ranges``."""
+    i = bisect.bisect_right(ranges, (pk, float('inf'))) - 1
+    return i >= 0 and pk <= ranges[i][1]
+
+
+def select_word_ids(source, ranges=(), all_words=False, exclude=()):
+    """
+    Pks of the words of ``source`` picked by a selection: every word
+    (``all_words``) or those within ``ranges``, minus those within the
+    ``exclude`` ranges. One query over the list's memberships, however many
+    words are picked.
+    """
+    word_ids = source.memberships.order_by('word_id').values_list('word_id', flat=True)
+    return [
+        pk for pk in word_ids
+        if (all_words or in_ranges(ranges, pk)) and not in_ranges(exclude, pk)
+    ]
+
+
+def add_words(vocab_list, word_ids):
+    """Add the existing words among ``word_ids`` to the list; returns the number added."""
+    word_ids = set(word_ids)
+    word_ids &= set(Word.objects.filter(pk__in=word_ids).values_list('pk', flat=True))
+    word_ids -= set(vocab_list.memberships.filter(word_id__in=word_ids).values_list('word_id', flat=True))
+    ListMembership.objects.bulk_create(
+        [ListMembership(vocab_list=vocab_list, word_id=pk) for pk in sorted(word_ids)], batch_size=500
+    )
+    if word_ids:
+        # bulk_create bypasses the ListMembership signals
+        word_list_changed.send(sender=ListMembership, vocab_list_ids=[vocab_list.pk])
+    return len(word_ids)
+
+
+def edit_word(vocab_list, word, **changes):
+    """
+    Change a word of a custom list and return the edited Word.
+
+    A word owned by the list is updated in place. A shared word is copied
+    (copy on write) and the copy takes its place in this list; other lists and
+    the learners' Progress on the shared word are not affected, and Progress
+    on the copy starts from zero.
+    """
+    unknown = set(changes) - set(EDITABLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Fields cannot be edited: {', '.join(sorted(unknown))}")
+    if vocab_list.is_system:
+        raise ValueError('System list words are edited by the importer')
+
+    if word.vocab_list_id == vocab_list.pk:
+        for field, value in changes.items():
+            setattr(word, field, value)
+        word.save(update_fields=list(changes))
+        return word
+
+    with transaction.atomic():
+        vocab_list.memberships.filter(word=word).delete()
+        copy = Word(
+            vocab_list=vocab_list,
+            metadata=word.metadata,
+            **{field: changes.get(field, getattr(word, field)) for field in EDITABLE_FIELDS},
+        )
+        # save() adds the copy to the list
+        copy.save()
+    return copy
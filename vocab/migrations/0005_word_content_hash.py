@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocab', '0004_alter_progress_word'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
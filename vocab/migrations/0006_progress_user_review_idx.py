@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocab', '0005_word_content_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['user', 'next_review'], name='progress_user_review_idx'),
+        ),
+    ]
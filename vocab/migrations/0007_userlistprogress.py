@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocab', '0006_progress_user_review_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserListProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_words', models.PositiveIntegerField(default=0)),
+                ('learned_words', models.PositiveIntegerField(default=0)),
+                ('in_progress_words', models.PositiveIntegerField(default=0)),
+                ('last_learned', models.DateField(blank=True, null=True)),
+                ('unlocks_on', models.DateField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='list_progress', to=settings.AUTH_USER_MODEL)),
+                ('vocab_list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_summaries', to='vocab.vocabularylist')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'vocab_list'), name='unique_user_list_progress')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-18 12:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_progress(apps, schema_editor):
+    """
+    Merge duplicate (user, word) rows into the one with the most correct answers
+    so the unique constraint can be added.
+    """
+    Progress = apps.get_model('vocab', 'Progress')
+    duplicates = (Progress.objects
+                  .values('user_id', 'word_id')
+                  .annotate(n=Count('id'))
+                  .filter(n__gt=1))
+    for group in duplicates.iterator():
+        rows = list(Progress.objects
+                    .filter(user_id=group['user_id'], word_id=group['word_id'])
+                    .order_by('-correct_count', 'id'))
+        keep, others = rows[0], rows[1:]
+        last_correct = [row.last_correct for row in rows if row.last_correct]
+        next_review = [row.next_review for row in rows if row.next_review]
+        keep.last_correct = max(last_correct) if last_correct else None
+        keep.next_review = min(next_review) if next_review else None
+        keep.save(update_fields=['last_correct', 'next_review'])
+        Progress.objects.filter(pk__in=[row.pk for row in others]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocab', '0007_userlistprogress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_progress, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['user', 'last_correct', 'correct_count'], name='progress_user_mastered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['vocab_list', 'word'], name='word_list_word_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='progress',
+            constraint=models.UniqueConstraint(fields=('user', 'word'), name='unique_user_word_progress'),
+        ),
+    ]
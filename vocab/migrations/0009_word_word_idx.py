@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocab', '0008_progress_unique_user_word'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['word'], name='word_word_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 14:40
+
+from django.db import migrations
+
+
+def create_search_tables(apps, schema_editor):
+    # FTS5 is SQLite specific; other backends use the icontains fallback of vocab.search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS vocab_word_fts "
+        "USING fts5(word, translation, example, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS vocab_word_trigram "
+        "USING fts5(word, translation, tokenize='trigram')"
+    )
+    schema_editor.execute(
+        "INSERT INTO vocab_word_fts (rowid, word, translation, example) "
+        "SELECT id, word, translation, example FROM vocab_word"
+    )
+    schema_editor.execute(
+        "INSERT INTO vocab_word_trigram (rowid, word, translation) "
+        "SELECT id, word, translation FROM vocab_word"
+    )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS vocab_word_fts")
+    schema_editor.execute("DROP TABLE IF EXISTS vocab_word_trigram")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocab', '0009_word_word_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,142 @@
+# Generated by Django 6.0 on 2026-10-18 15:30
+
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# fields that are equal on a word and the copies CreateListView used to make of it
+COPIED_FIELDS = ('word', 'translation', 'word_type', 'example', 'example_translation', 'metadata')
+
+CHUNK_SIZE = 500
+
+
+def add_memberships(apps, schema_editor):
+    """Make every word a member of its own list, then replace copies of system words by references."""
+    Word = apps.get_model('vocab', 'Word')
+    ListMembership = apps.get_model('vocab', 'ListMembership')
+    UserListProgress = apps.get_model('vocab', 'UserListProgress')
+
+    schema_editor.execute(
+        f"INSERT INTO {ListMembership._meta.db_table} (vocab_list_id, word_id) "
+        f"SELECT vocab_list_id, id FROM {Word._meta.db_table}"
+    )
+
+    copies = (Word.objects.filter(vocab_list__is_system=False)
+              .values('pk', 'vocab_list_id', 'vocab_list__level_id', *COPIED_FIELDS)
+              .order_by('pk'))
+    chunk = []
+    for row in copies.iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            collapse_copies(apps, chunk)
+            chunk = []
+    if chunk:
+        collapse_copies(apps, chunk)
+
+    # Progress on the system words now counts for the custom lists as well;
+    # the summary rows are rebuilt on first use
+    UserListProgress.objects.all().delete()
+
+    if schema_editor.connection.vendor == 'sqlite':
+        # the search tables of migration 0010 still index the deleted copies
+        for table in ('vocab_word_fts', 'vocab_word_trigram'):
+            schema_editor.execute(f"DELETE FROM {table} WHERE rowid NOT IN (SELECT id FROM {Word._meta.db_table})")
+
+
+def collapse_copies(apps, copies):
+    Word = apps.get_model('vocab', 'Word')
+    ListMembership = apps.get_model('vocab', 'ListMembership')
+    Progress = apps.get_model('vocab', 'Progress')
+
+    originals = {}  # copied fields -> [(level pk, word pk)] of system words
+    candidates = (Word.objects
+                  .filter(vocab_list__is_system=True, word__in={row['word'] for row in copies})
+                  .values('pk', 'vocab_list__level_id', *COPIED_FIELDS)
+                  .order_by('pk'))
+    for row in candidates:
+        originals.setdefault(_key(row), []).append((row['vocab_list__level_id'], row['pk']))
+
+    for copy in copies:
+        matches = originals.get(_key(copy))
+        if not matches:
+            # written by the user, not a copy
+            continue
+        # prefer the system word of the list's level
+        original = next((pk for level_id, pk in matches if level_id == copy['vocab_list__level_id']), matches[0][1])
+
+        memberships = ListMembership.objects.filter(vocab_list_id=copy['vocab_list_id'])
+        if not memberships.filter(word_id=original).exists():
+            memberships.filter(word_id=copy['pk']).update(word_id=original)
+
+        for progress in Progress.objects.filter(word_id=copy['pk']):
+            existing = Progress.objects.filter(user_id=progress.user_id, word_id=original).first()
+            if existing is None:
+                progress.word_id = original
+                progress.save(update_fields=['word'])
+                continue
+            # same merge as the dedupe in 0008
+            existing.correct_count = max(existing.correct_count, progress.correct_count)
+            existing.last_correct = max(filter(None, [existing.last_correct, progress.last_correct]), default=None)
+            existing.next_review = min(filter(None, [existing.next_review, progress.next_review]), default=None)
+            existing.save(update_fields=['correct_count', 'last_correct', 'next_review'])
+            progress.delete()
+
+        Word.objects.filter(pk=copy['pk']).delete()
+
+
+def _key(row):
+    return tuple(
+        json.dumps(row[field], sort_keys=True) if field == 'metadata' else row[field]
+        for field in COPIED_FIELDS
+    )
+
+
+def copy_shared_words(apps, schema_editor):
+    """Reverse: give the custom lists their own copies again (Progress stays on the system words)."""
+    Word = apps.get_model('vocab', 'Word')
+    ListMembership = apps.get_model('vocab', 'ListMembership')
+
+    shared = (ListMembership.objects
+              .exclude(vocab_list_id=models.F('word__vocab_list_id'))
+              .select_related('word'))
+    Word.objects.bulk_create(
+        [
+            Word(vocab_list_id=membership.vocab_list_id,
+                 **{field: getattr(membership.word, field) for field in COPIED_FIELDS})
+            for membership in shared.iterator(chunk_size=CHUNK_SIZE)
+        ],
+        batch_size=CHUNK_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocab', '0010_word_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='word',
+            name='vocab_list',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='owned_words', to='vocab.vocabularylist'),
+        ),
+        migrations.CreateModel(
+            name='ListMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vocab_list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='vocab.vocabularylist')),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='vocab.word')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('vocab_list', 'word'), name='unique_list_word')],
+            },
+        ),
+        migrations.AddField(
+            model_name='vocabularylist',
+            name='words',
+            field=models.ManyToManyField(related_name='lists', through='vocab.ListMembership', to='vocab.word'),
+        ),
+        migrations.RunPython(add_memberships, copy_shared_words),
+    ]
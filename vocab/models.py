@@ -20,6 +20,8 @@ class VocabularyList(models.Model):
     language = models.ForeignKey(Language, on_delete=models.CASCADE, null=True, blank=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     is_system = models.BooleanField(default=True)
+    # custom lists reference the shared system words instead of copying them
+    words = models.ManyToManyField('Word', through='ListMembership', related_name='lists')
 
     def __str__(self):
         return self.name
@@ -27,15 +29,49 @@ class VocabularyList(models.Model):
 class Word(models.Model):
     word = models.CharField(max_length=100)
     translation = models.CharField(max_length=200)
-    vocab_list = models.ForeignKey(VocabularyList, on_delete=models.CASCADE, related_name='words')
+    # the list the word was created in (a system list, or a custom list for edited copies);
+    # the lists that contain it are ``lists``
+    vocab_list = models.ForeignKey(VocabularyList, on_delete=models.CASCADE, related_name='owned_words')
     word_type = models.CharField(max_length=50, blank=True, null=True)
     example = models.TextField(blank=True, null=True)
     example_translation = models.TextField(blank=True, null=True)
     metadata = models.JSONField(default=dict, blank=True)
+    # sha256 of the fields last written by the importer, used to skip unchanged rows on re-import
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # importer lookups (vocab_list=... AND word IN ...)
+            models.Index(fields=['vocab_list', 'word'], name='word_list_word_idx'),
+            # keyset pagination of the vocabulary page on (word, pk)
+            models.Index(fields=['word'], name='word_word_idx'),
+        ]
 
     def __str__(self):
         return f"{self.word} ({self.translation})"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            # a word is always a member of the list it was created in;
+            # bulk_create callers add the ListMembership rows themselves
+            ListMembership.objects.create(vocab_list_id=self.vocab_list_id, word=self)
+
+class ListMembership(models.Model):
+    """A word in a vocabulary list. Words are shared by every list that contains them."""
+    vocab_list = models.ForeignKey(VocabularyList, on_delete=models.CASCADE, related_name='memberships')
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name='memberships')
+
+    class Meta:
+        constraints = [
+            # also the index of the list=... lookups; word=... uses the foreign key index
+            models.UniqueConstraint(fields=['vocab_list', 'word'], name='unique_list_word'),
+        ]
+
+    def __str__(self):
+        return f"{self.vocab_list.name} - {self.word.word}"
+
 class Progress(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name='progresses')
@@ -45,5 +81,39 @@ class Progress(models.Model):
     last_correct = models.DateField(null=True, blank=True)
     next_review = models.DateField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            # also the index of every user=... AND word=... lookup
+            models.UniqueConstraint(fields=['user', 'word'], name='unique_user_word_progress'),
+        ]
+        indexes = [
+            # "due today" review: user=... AND next_review <= today ORDER BY next_review
+            models.Index(fields=['user', 'next_review'], name='progress_user_review_idx'),
+            # "mastered today": user=... AND last_correct=today AND correct_count >= threshold
+            models.Index(fields=['user', 'last_correct', 'correct_count'], name='progress_user_mastered_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} -  {self.word.word} ({self.correct_count})"
+
+class UserListProgress(models.Model):
+    """
+    Per-user summary of the Progress rows of one list, maintained incrementally
+    (see vocab/list_progress.py) so pages do not recount Progress.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='list_progress')
+    vocab_list = models.ForeignKey(VocabularyList, on_delete=models.CASCADE, related_name='progress_summaries')
+    total_words = models.PositiveIntegerField(default=0)
+    learned_words = models.PositiveIntegerField(default=0)
+    in_progress_words = models.PositiveIntegerField(default=0)
+    last_learned = models.DateField(null=True, blank=True)
+    # set while the list is completed: the day it can be repeated again
+    unlocks_on = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'vocab_list'], name='unique_user_list_progress'),
+        ]
+
     def __str__(self):
-        return f"{self.user.username} -  {self.word.word} ({self.correct_count})"
\ No newline at end of file
+        return f"{self.user.username} - {self.vocab_list.name} ({self.learned_words}/{self.total_words})"
@@ -0,0 +1,149 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are selected with ``WHERE (key1, key2) > (last values)`` instead of
+OFFSET, so with an index on the ordering keys every page costs the same as the
+first one, and no COUNT(*) is needed to paginate.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Q
+
+# Seconds an approximate count is reused
+APPROX_COUNT_TIMEOUT = 10 * 60
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """
+    Return the key values of a cursor, or None if it is missing or malformed.
+    ``types`` holds the accepted Python type(s) of each key value, so a
+    crafted cursor cannot reach the query with values of the wrong type.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(types):
+        return None
+    for value, accepted in zip(values, types):
+        # bool is an int subclass but no valid key value
+        if isinstance(value, bool) or not isinstance(value, accepted):
+            return None
+    return values
+
+
+def _key_type(field):
+    """The JSON value type(s) a cursor may hold for ``field``."""
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return int
+    if isinstance(field, (models.CharField, models.TextField)):
+        return str
+    return (str, int, float)
+
+
+def approximate_count(queryset, timeout=APPROX_COUNT_TIMEOUT):
+    """COUNT(*) of the queryset, cached per query for ``timeout`` seconds."""
+    key = 'approx_count:' + hashlib.sha256(str(queryset.query).encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor, count):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        # approximate number of rows in all pages, None unless requested
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset ordered by ``keys`` (ascending, unique together,
+    ideally the columns of an index ending in the primary key).
+    """
+
+    def __init__(self, queryset, per_page, keys=('word', 'pk'), with_count=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = keys
+        self.with_count = with_count
+
+    def key_types(self):
+        opts = self.queryset.model._meta
+        return [_key_type(opts.pk if key == 'pk' else opts.get_field(key)) for key in self.keys]
+
+    def _beyond(self, values, lookup):
+        """
+        Rows strictly after (lookup 'gt') or before ('lt') ``values`` in key
+        order, as an OR of prefix matches: k1 > v1 OR (k1 = v1 AND k2 > v2) ...
+        The extra ``k1 >= v1`` bound lets the database seek in the index
+        instead of scanning it from the start.
+        """
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            prefix = dict(zip(self.keys[:i], values))
+            condition |= Q(**prefix, **{f'{key}__{lookup}': values[i]})
+        return Q(**{f'{self.keys[0]}__{lookup}e': values[0]}) & condition
+
+    def _cursor(self, obj):
+        return encode_cursor([getattr(obj, key) for key in self.keys])
+
+    def page(self, after=None, before=None):
+        """
+        The page following the ``after`` cursor, or preceding the ``before``
+        cursor; the first page if neither is given (or valid).
+        One extra row is read to know whether there is another page.
+        """
+        types = self.key_types()
+        after = decode_cursor(after, types)
+        before = decode_cursor(before, types) if after is None else None
+
+        if before is not None:
+            descending = [f'-{key}' for key in self.keys]
+            rows = list(self.queryset.filter(self._beyond(before, 'lt')).order_by(*descending)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            previous_cursor = self._cursor(rows[0]) if has_more else None
+            next_cursor = self._cursor(rows[-1]) if rows else None
+        else:
+            queryset = self.queryset.order_by(*self.keys)
+            if after is not None:
+                queryset = queryset.filter(self._beyond(after, 'gt'))
+            rows = list(queryset[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            next_cursor = self._cursor(rows[-1]) if has_more else None
+            previous_cursor = self._cursor(rows[0]) if after is not None and rows else None
+
+        count = approximate_count(self.queryset) if self.with_count else None
+        return KeysetPage(rows, self, next_cursor, previous_cursor, count)
@@ -0,0 +1,82 @@
+"""
+In-process registry of reference data: languages, language levels and system
+lists. These rows are loaded once per process and reloaded after a change.
+
+A change (model signals in signals.py, the end of import_vocab) bumps a version
+number in the Django cache, so other processes reload as well when the cache
+backend is shared. The default LocMemCache is per process, and import_vocab runs
+in a process of its own, so the data is also reloaded after MAX_AGE seconds.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import Language, LanguageLevel, VocabularyList
+
+VERSION_KEY = 'reference_data:version'
+
+# Seconds the data is reused without a version change
+MAX_AGE = 60
+
+_lock = threading.Lock()
+_data = None
+
+
+class ReferenceData:
+    def __init__(self, version):
+        self.version = version
+        self.expires_at = time.monotonic() + MAX_AGE
+        self.languages = {language.name: language for language in Language.objects.all()}
+        self.levels = list(LanguageLevel.objects.order_by('code'))
+        self.levels_by_code = {level.code: level for level in self.levels}
+        levels_by_pk = {level.pk: level for level in self.levels}
+        self.system_lists = list(VocabularyList.objects.filter(is_system=True).order_by('pk'))
+        self.system_lists_by_key = {}
+        for vocab_list in self.system_lists:
+            # attach the cached level so templates can show the code without a query
+            vocab_list.level = levels_by_pk[vocab_list.level_id]
+            self.system_lists_by_key.setdefault((vocab_list.name, vocab_list.level_id, vocab_list.language_id), vocab_list)
+
+
+def get_data():
+    global _data
+    version = cache.get_or_set(VERSION_KEY, 1, timeout=None)
+    data = _data
+    if data is None or data.version != version or data.expires_at <= time.monotonic():
+        with _lock:
+            if _data is None or _data.version != version or _data.expires_at <= time.monotonic():
+                _data = ReferenceData(version)
+            data = _data
+    return data
+
+
+def invalidate():
+    """Reload the reference data in every process on next access."""
+    global _data
+    _data = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+
+
+def get_levels():
+    """All language levels ordered by code."""
+    return get_data().levels
+
+
+def get_level(code):
+    return get_data().levels_by_code.get(code)
+
+
+def get_language(name):
+    return get_data().languages.get(name)
+
+
+def get_system_lists():
+    return get_data().system_lists
+
+
+def get_system_list(name, level, language):
+    return get_data().system_lists_by_key.get((name, level.pk, language.pk if language else None))
@@ -0,0 +1,164 @@
+"""
+Word search backed by two SQLite FTS5 tables (created in migration 0010):
+
+- ``vocab_word_fts``: word, translation and example, tokenized by unicode61
+  with diacritics removed; answers term and prefix queries ranked by bm25.
+- ``vocab_word_trigram``: word and translation, tokenized into trigrams;
+  finds candidates for misspelled queries, which are then scored with difflib.
+
+Both use the Word primary key as rowid and are kept in sync by the Word
+signals, the importer and list copies through ``index_words``/``remove_words``.
+On other database backends ``search_word_ids`` falls back to icontains.
+"""
+import difflib
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Word
+
+FTS_TABLE = 'vocab_word_fts'
+TRIGRAM_TABLE = 'vocab_word_trigram'
+
+SEARCH_LIMIT = 50
+# candidates read from the trigram index for a fuzzy search
+FUZZY_CANDIDATES = 200
+# minimum difflib ratio for a fuzzy match
+FUZZY_MIN_RATIO = 0.7
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def is_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def index_words(pks):
+    """(Re)index the given words. Call after writes that bypass the Word signals."""
+    pks = list(pks)
+    if not pks or not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), 500):
+            chunk = pks[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            for table, columns in ((FTS_TABLE, 'word, translation, example'), (TRIGRAM_TABLE, 'word, translation')):
+                cursor.execute(f'DELETE FROM {table} WHERE rowid IN ({placeholders})', chunk)
+                cursor.execute(
+                    f'INSERT INTO {table} (rowid, {columns}) '
+                    f'SELECT id, {columns} FROM vocab_word WHERE id IN ({placeholders})',
+                    chunk,
+                )
+
+
+def remove_words(pks):
+    pks = list(pks)
+    if not pks or not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), 500):
+            chunk = pks[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            for table in (FTS_TABLE, TRIGRAM_TABLE):
+                cursor.execute(f'DELETE FROM {table} WHERE rowid IN ({placeholders})', chunk)
+
+
+def rebuild():
+    """Rebuild both tables from vocab_word."""
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'DELETE FROM {TRIGRAM_TABLE}')
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, word, translation, example) '
+                       f'SELECT id, word, translation, example FROM vocab_word')
+        cursor.execute(f'INSERT INTO {TRIGRAM_TABLE} (rowid, word, translation) '
+                       f'SELECT id, word, translation FROM vocab_word')
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _within(queryset):
+    """SQL restricting rowid to the pks of ``queryset`` (or nothing if None)."""
+    if queryset is None:
+        return '', []
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    return f' AND rowid IN ({sql})', list(params)
+
+
+def _match(table, match, limit, within, ranked=True):
+    within_sql, within_params = _within(within)
+    # bm25 ranking reads every match; unranked queries stop after ``limit`` rows
+    order = ' ORDER BY rank' if ranked else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s{within_sql}{order} LIMIT %s',
+            [match, *within_params, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fuzzy_ids(terms, limit, within, exclude):
+    text = ' '.join(terms).lower()
+    trigrams = {text[i:i + 3] for i in range(len(text) - 2) if ' ' not in text[i:i + 3]}
+    if not trigrams:
+        return []
+    match = ' OR '.join(map(_quote, sorted(trigrams)))
+    candidates = [pk for pk in _match(TRIGRAM_TABLE, match, FUZZY_CANDIDATES, within) if pk not in exclude]
+    if not candidates:
+        return []
+
+    matcher = difflib.SequenceMatcher()
+    matcher.set_seq2(text)
+    scored = []
+    for pk, word, translation in Word.objects.filter(pk__in=candidates).values_list('pk', 'word', 'translation'):
+        best = 0.0
+        for value in (word, translation):
+            matcher.set_seq1((value or '').lower())
+            # the cheap upper bounds skip most candidates before the full ratio
+            if matcher.real_quick_ratio() >= FUZZY_MIN_RATIO and matcher.quick_ratio() >= FUZZY_MIN_RATIO:
+                best = max(best, matcher.ratio())
+        if best >= FUZZY_MIN_RATIO:
+            scored.append((-best, pk))
+    return [pk for _, pk in sorted(scored)[:limit]]
+
+
+def search_word_ids(query, limit=SEARCH_LIMIT, within=None):
+    """
+    Primary keys of the words matching ``query``, best first.
+
+    Every term must match (the last one as a prefix). Matches in the word or
+    translation come first, ranked by bm25, then matches in examples. If that
+    finds fewer than ``limit`` words, words within a small edit distance of
+    the query are appended. ``within`` is an optional Word queryset that
+    restricts the result, e.g. to one level.
+    """
+    terms = _TERM.findall(query or '')
+    if not terms:
+        return []
+
+    if not is_enabled():
+        condition = Q()
+        for term in terms:
+            condition &= Q(word__icontains=term) | Q(translation__icontains=term) | Q(example__icontains=term)
+        queryset = within if within is not None else Word.objects.all()
+        return list(queryset.filter(condition).order_by('word', 'pk').values_list('pk', flat=True)[:limit])
+
+    match = ' '.join([_quote(term) for term in terms[:-1]] + [_quote(terms[-1]) + '*'])
+    ids = _match(FTS_TABLE, f'{{word translation}}: ({match})', limit, within)
+    if len(ids) < limit:
+        found = set(ids)
+        ids += [pk for pk in _match(FTS_TABLE, match, limit, within, ranked=False) if pk not in found][:limit - len(ids)]
+    if len(ids) < limit and len(''.join(terms)) >= 3:
+        ids += _fuzzy_ids(terms, limit - len(ids), within, exclude=set(ids))
+    return ids
+
+
+def search_words(query, limit=SEARCH_LIMIT, within=None):
+    """The matching Word objects (with list and level), best first."""
+    ids = search_word_ids(query, limit, within)
+    words = Word.objects.select_related('vocab_list', 'vocab_list__level').in_bulk(ids)
+    return [words[pk] for pk in ids if pk in words]
@@ -0,0 +1,68 @@
+from django.db.models import Count
+from django.utils import timezone
+
+from sprachlernen.constants import LEARNED_THRESHOLD, PROGRESS_CIRCLE_CIRCUMFERENCE
+from .list_progress import fill_summaries, lock_state, with_summaries
+from .models import Progress
+
+
+class ListMetricsService:
+    """
+    Progress metrics of one user for any set of vocabulary lists.
+
+    The queries do not depend on the number of lists: one for the lists joined
+    with their UserListProgress rows and one grouped count of the words learned
+    today (missing summary rows are built once, on the first visit).
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def for_lists(self, vocab_lists, learned_today=True):
+        """Metrics dicts for a VocabularyList queryset, in its order."""
+        today = timezone.localdate()
+        vocab_lists = fill_summaries(with_summaries(vocab_lists, self.user), self.user)
+        today_counts = self.get_learned_today([vlist.pk for vlist in vocab_lists], today) if learned_today else {}
+        return [self.build(vlist, today_counts.get(vlist.pk, 0), today) for vlist in vocab_lists]
+
+    def for_list(self, vocab_list, learned_today=True):
+        return self.for_lists(type(vocab_list).objects.filter(pk=vocab_list.pk), learned_today)[0]
+
+    def get_learned_today(self, vocab_list_ids, today):
+        """{list pk: number of words mastered today} in one grouped query."""
+        if not vocab_list_ids:
+            return {}
+        return dict(
+            Progress.objects.filter(
+                user=self.user,
+                word__memberships__vocab_list_id__in=vocab_list_ids,
+                last_correct=today,
+                correct_count__gte=LEARNED_THRESHOLD,
+            )
+            .values('word__memberships__vocab_list_id').annotate(n=Count('pk'))
+            .values_list('word__memberships__vocab_list_id', 'n')
+        )
+
+    def build(self, vlist, learned_today, today):
+        total_words = vlist.total_words
+        learned_words = vlist.learned_words
+        fraction = (learned_words / total_words) if total_words > 0 else 0.0
+        # a completed list is locked until LOCK_DAYS after the last learned word
+        is_locked, unlock_in_days = lock_state(vlist.unlocks_on, today)
+        CIRC = PROGRESS_CIRCLE_CIRCUMFERENCE
+        return {
+            'id': vlist.pk,
+            'pk': vlist.pk,
+            'name': vlist.name,
+            'total_words': total_words,
+            'learned_words': learned_words,
+            'in_progress_words': vlist.in_progress_words,
+            'learned_today': learned_today,
+            # progress percent shows fraction of words learned (mastered)
+            'progress_percent': round(fraction * 100, 1),
+            # SVG circle dash offset, computed from the raw fraction to avoid rounding issues
+            'progress_offset': max(0.0, min(CIRC, CIRC * (1.0 - fraction))),
+            'is_completed': 0 < total_words == learned_words,
+            'is_locked': is_locked,
+            'unlock_in_days': unlock_in_days,
+        }
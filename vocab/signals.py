@@ -0,0 +1,81 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import autocomplete, list_progress, reference, search
+from .context_processors import bump_nav_version
+from .models import Language, LanguageLevel, ListMembership, VocabularyList, Word
+
+# Sent when words were added to or removed from vocabulary lists.
+# Bulk writes that bypass the model signals (importer, list copies) send it explicitly.
+# Arguments: vocab_list_ids - iterable of VocabularyList primary keys
+word_list_changed = Signal()
+
+# Sent when fields of words in vocabulary lists changed; the lists still contain
+# the same words, so word counts and list progress are not affected.
+# Arguments: vocab_list_ids - iterable of VocabularyList primary keys
+words_edited = Signal()
+
+
+@receiver(post_save, sender=Word)
+def word_saved(sender, instance, created, **kwargs):
+    # a new word is added to its list by Word.save, which sends through the membership;
+    # a deleted word sends through its memberships, deleted along with it
+    if not created:
+        vocab_list_ids = list(instance.memberships.values_list('vocab_list_id', flat=True))
+        words_edited.send(sender=Word, vocab_list_ids=vocab_list_ids)
+
+
+@receiver([post_save, post_delete], sender=ListMembership)
+def membership_saved_or_deleted(sender, instance, **kwargs):
+    word_list_changed.send(sender=ListMembership, vocab_list_ids=[instance.vocab_list_id])
+
+
+@receiver(m2m_changed, sender=ListMembership)
+def list_words_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # vocab_list.words.add()/remove()/clear() and word.lists.add()/remove()
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        word_list_changed.send(sender=ListMembership, vocab_list_ids=[instance.pk])
+    elif pk_set:
+        word_list_changed.send(sender=ListMembership, vocab_list_ids=list(pk_set))
+
+
+@receiver(post_save, sender=Word)
+def index_saved_word(sender, instance, **kwargs):
+    search.index_words([instance.pk])
+
+
+@receiver(post_delete, sender=Word)
+def unindex_deleted_word(sender, instance, **kwargs):
+    search.remove_words([instance.pk])
+
+
+@receiver(word_list_changed)
+def refresh_list_progress(sender, vocab_list_ids, **kwargs):
+    # word counts changed, so recompute the summary rows of every user of these lists
+    list_progress.refresh_lists(vocab_list_ids)
+
+
+@receiver([word_list_changed, words_edited])
+def system_words_changed(sender, vocab_list_ids, **kwargs):
+    # the autocomplete indexes hold the words of the system lists only
+    system_ids = {vocab_list.pk for vocab_list in reference.get_system_lists()}
+    if system_ids.intersection(vocab_list_ids):
+        autocomplete.invalidate()
+
+
+@receiver([post_save, post_delete], sender=VocabularyList)
+@receiver([post_save, post_delete], sender=LanguageLevel)
+def nav_lists_changed(sender, **kwargs):
+    # the cached navigation shows list names and level codes
+    bump_nav_version()
+
+
+@receiver([post_save, post_delete], sender=Language)
+@receiver([post_save, post_delete], sender=LanguageLevel)
+@receiver([post_save, post_delete], sender=VocabularyList)
+def reference_data_changed(sender, instance, **kwargs):
+    # custom lists are not part of the reference data
+    if sender is not VocabularyList or instance.is_system:
+        reference.invalidate()
@@ -0,0 +1,34 @@
+"""Test fixtures shared by the apps' test modules."""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .models import LanguageLevel, VocabularyList, Word
+
+
+def add_words(vocab_list, count, word='wort{i}', translation='word{i}', start=0):
+    """Bulk-create ``count`` words in ``vocab_list``, named after the ``word`` and ``translation`` formats."""
+    words = Word.objects.bulk_create([
+        Word(word=word.format(i=i), translation=translation.format(i=i), vocab_list=vocab_list)
+        for i in range(start, start + count)
+    ])
+    vocab_list.words.add(*words)
+    return words
+
+
+class LearnerTestCase(TestCase):
+    """
+    A learner and the 'System List A1' list, created once per test class.
+
+    ``words`` holds the ``word_count`` words of the list, named after
+    ``word_format`` and ``translation_format``.
+    """
+    word_count = 0
+    word_format = 'wort{i}'
+    translation_format = 'word{i}'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='learner', password='pw')
+        cls.level = LanguageLevel.objects.create(code='A1', description='Level A1')
+        cls.vocab_list = VocabularyList.objects.create(name='System List A1', level=cls.level)
+        cls.words = add_words(cls.vocab_list, cls.word_count, cls.word_format, cls.translation_format)
@@ -1,3 +1,955 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from lessons import distractors
+from lessons.lesson_service import LessonService
+from sprachlernen.constants import LEARNED_THRESHOLD, LOCK_DAYS
+from sprachlernen.utils import seen_keys
+from sprachlernen.utils.vocab_populator import VocabPopulator
+from sprachlernen.utils.vocab_reader import VocabFormatError, VocabReader
+from . import autocomplete, deletion, list_progress, memberships, reference, search
+from .context_processors import nav_lists
+from .models import Language, LanguageLevel, ListMembership, Progress, UserListProgress, VocabularyList, Word
+from .pagination import KeysetPaginator, encode_cursor
+from .services import ListMetricsService
+from .testing import LearnerTestCase, add_words
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        reference.invalidate()
+
+    def write(self, name, words):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'words': [
+                {'word': word, 'translation': translation, 'details': {'level': 'A1'}}
+                for word, translation in words
+            ]}, f)
+        return path
+
+    def populate(self, path, **kwargs):
+        populator = VocabPopulator(stdout=StringIO(), stderr=StringIO(), quiet=True, **kwargs)
+        ok = populator.import_from_json(path)
+        return ok, populator.results[-1]
+
+    def test_new_and_changed_words_are_written_in_bulk(self):
+        path = self.write('words.json', [('Haus', 'house'), ('Hund', 'dog')])
+        ok, result = self.populate(path)
+        self.assertTrue(ok)
+        self.assertEqual((result['new'], result['rows']), (2, 2))
+        vocab_list = VocabularyList.objects.get(name='System List A1', is_system=True)
+        self.assertEqual(sorted(vocab_list.words.values_list('word', flat=True)), ['Haus', 'Hund'])
+
+        path = self.write('words.json', [('Haus', 'building'), ('Hund', 'dog'), ('Katze', 'cat')])
+        ok, result = self.populate(path)
+        self.assertEqual((result['new'], result['updated'], result['unchanged']), (1, 1, 1))
+        self.assertEqual(Word.objects.get(word='Haus').translation, 'building')
+
+        # the number of queries of a batch does not depend on its size
+        query_counts = []
+        for size in (2, 20):
+            path = self.write('words.json', [(f'Wort{size}-{i}', 'word') for i in range(size)])
+            with CaptureQueriesContext(connection) as queries:
+                self.populate(path, batch_size=size)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_failed_import_leaves_the_database_unchanged(self):
+        Word.objects.create(word='Haus', translation='house', vocab_list=VocabularyList.objects.create(
+            name='System List A1', level=LanguageLevel.objects.create(code='A1', description='Level A1'),
+            language=Language.objects.create(name='German')))
+        reference.invalidate()
+        path = os.path.join(self.tmp.name, 'broken.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            # the entry without a word fails in the second batch, after the first one was written
+            json.dump({'words': [
+                {'word': 'Haus', 'translation': 'building', 'details': {'level': 'A1'}},
+                {'word': 'Hund', 'translation': 'dog', 'details': {'level': 'A1'}},
+                {'translation': 'nothing', 'details': {'level': 'A1'}},
+            ]}, f)
+        stderr = StringIO()
+        ok = VocabPopulator(stdout=StringIO(), stderr=stderr, quiet=True, batch_size=2).import_from_json(path)
+        self.assertFalse(ok)
+        self.assertIn('no changes were saved', stderr.getvalue())
+        self.assertEqual(list(Word.objects.values_list('word', 'translation')), [('Haus', 'house')])
+
+    def test_quiet_mode_prints_one_summary_line(self):
+        path = self.write('words.json', [('Haus', 'house'), ('Hund', 'dog')])
+        stdout = StringIO()
+        VocabPopulator(stdout=stdout, stderr=StringIO(), quiet=True).import_from_json(path)
+        [line] = stdout.getvalue().splitlines()
+        self.assertIn('New: 2', line)
+        self.assertIn('rows/s', line)
+
+        stdout = StringIO()
+        VocabPopulator(stdout=stdout, stderr=StringIO()).import_from_json(self.write('more.json', [('Katze', 'cat')]))
+        self.assertIn('Imported: Katze', stdout.getvalue())
+
+    def write_cefr(self, name):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'metadata': {'version': 1.25, 'nested': [{'a': [1, 2, {'b': None}]}]},
+                'levels': {
+                    'A1': {
+                        'count': 1234567,
+                        'vocabulary': [
+                            {'id': 10, 'lemma': 'Straße', 'pos': 'noun', 'gender': 'f',
+                             'translations': {'en': [{'text': 'street "road"'}]}, 'example_usage': 'Die Straße\n'},
+                            {'id': 11, 'lemma': 'gehen', 'pos': 'verb', 'translations': {}},
+                        ],
+                    },
+                    'B1': {'vocabulary': [{'id': 12.5, 'lemma': 'ordnen', 'pos': 'verb'}]},
+                },
+            }, f, ensure_ascii=False, indent=1)
+        return path
+
+    def test_reader_handles_values_split_across_chunks(self):
+        path = self.write_cefr('cefr.json')
+        expected = list(VocabReader(path, chunk_size=1 << 20))
+        self.assertEqual([(level, word) for level, word, _ in expected],
+                         [('A1', 'Straße'), ('A1', 'gehen'), ('B1', 'ordnen')])
+        self.assertEqual(expected[0][2]['translation'], 'street "road"')
+        self.assertEqual(expected[2][2]['metadata']['id'], 12.5)
+        # every chunk size splits strings, escapes and numbers somewhere else
+        for chunk_size in (1, 2, 3, 7, 64):
+            reader = VocabReader(path, chunk_size=chunk_size)
+            self.assertEqual(list(reader), expected, chunk_size)
+            self.assertEqual(reader.format, 'cefr')
+
+        path = self.write('simple.json', [('Haus', 'house'), ('Hund', 'dog')])
+        reader = VocabReader(path, chunk_size=5)
+        self.assertEqual([(level, word) for level, word, _ in reader], [('A1', 'Haus'), ('A1', 'Hund')])
+        self.assertEqual(reader.format, 'simple')
+
+    def test_reader_prefers_levels_over_words_in_any_order(self):
+        entry = {'word': 'Haus', 'translation': 'house'}
+        cefr = {'A2': {'vocabulary': [{'lemma': 'gehen', 'pos': 'verb'}]}}
+        for name, document in (('words-first.json', {'words': [entry], 'levels': cefr}),
+                               ('levels-first.json', {'levels': cefr, 'words': [entry]})):
+            path = os.path.join(self.tmp.name, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(document, f)
+            reader = VocabReader(path, chunk_size=3)
+            self.assertEqual([(level, word) for level, word, _ in reader], [('A2', 'gehen')], name)
+            self.assertEqual(reader.format, 'cefr')
+
+    def test_reader_rejects_malformed_files(self):
+        for name, text in (('truncated.json', '{"words": [{"word": "Haus"'),
+                           ('trailing.json', '{"words": []} []'),
+                           ('array.json', '[1, 2]'),
+                           ('latin1.json', '{"words": [{"word": "Stra\xdfe"}]}')):
+            path = os.path.join(self.tmp.name, name)
+            with open(path, 'w', encoding='latin-1') as f:
+                f.write(text)
+            with self.assertRaises(VocabFormatError, msg=name):
+                list(VocabReader(path, chunk_size=4))
+            stderr = StringIO()
+            self.assertFalse(VocabPopulator(stdout=StringIO(), stderr=stderr, quiet=True).import_from_json(path))
+            self.assertIn('Failed to parse JSON', stderr.getvalue())
+        self.assertFalse(Word.objects.exists())
+
+    def test_write_errors_are_not_reported_as_parse_errors(self):
+        path = self.write('words.json', [('Haus', 'house')])
+        stderr = StringIO()
+        with mock.patch.object(Word.objects, 'bulk_create', side_effect=ValueError('bad value')):
+            self.assertFalse(VocabPopulator(stdout=StringIO(), stderr=stderr, quiet=True).import_from_json(path))
+        self.assertIn('Import failed, no changes were saved', stderr.getvalue())
+        self.assertNotIn('Failed to parse JSON', stderr.getvalue())
+
+    def test_batch_size_option(self):
+        path = self.write('words.json', [(f'Wort{i}', 'word') for i in range(5)])
+        with mock.patch.object(VocabPopulator, '_write_batch', autospec=True,
+                               side_effect=VocabPopulator._write_batch) as write_batch:
+            call_command('import_vocab', path, '--batch-size', '2', quiet=True, stdout=StringIO())
+        self.assertEqual([len(call.args[1]) for call in write_batch.call_args_list], [2, 2, 1])
+        self.assertEqual(Word.objects.count(), 5)
+
+        for size in ('0', '-1'):
+            with self.assertRaisesMessage(CommandError, '--batch-size must be at least 1'):
+                call_command('import_vocab', path, '--batch-size', size, quiet=True, stdout=StringIO())
+
+    def test_import_files_parses_in_parallel_and_writes_in_order(self):
+        first = self.write('first.json', [('Haus', 'house'), ('Hund', 'dog')])
+        second = self.write('second.json', [('Katze', 'cat')])
+        broken = os.path.join(self.tmp.name, 'broken.json')
+        with open(broken, 'w', encoding='utf-8') as f:
+            f.write('{"words": [')
+        missing = os.path.join(self.tmp.name, 'missing.json')
+        stderr = StringIO()
+        populator = VocabPopulator(stdout=StringIO(), stderr=stderr, quiet=True)
+
+        self.assertFalse(populator.import_files([first, broken, missing, second], jobs=2))
+        self.assertEqual([(r['path'], r['ok'], r['new']) for r in populator.results],
+                         [(first, True, 2), (broken, False, 0), (missing, False, 0), (second, True, 1)])
+        self.assertIn(f'Failed to parse JSON ({broken})', stderr.getvalue())
+        self.assertIn(f'File not found: {missing}', stderr.getvalue())
+        self.assertEqual(set(Word.objects.values_list('word', flat=True)), {'Haus', 'Hund', 'Katze'})
+
+    def test_command_expands_globs_and_prints_timings(self):
+        self.write('a.json', [('Haus', 'house')])
+        self.write('b.json', [('Hund', 'dog')])
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_vocab', os.path.join(self.tmp.name, '*.json'),
+                     os.path.join(self.tmp.name, 'none-*.json'),
+                     quiet=True, jobs=2, stdout=stdout, stderr=stderr)
+        self.assertIn('No files match', stderr.getvalue())
+        table = [line for line in stdout.getvalue().splitlines() if line.startswith(self.tmp.name)]
+        self.assertEqual(len(table), 2)
+        self.assertTrue(all(line.endswith('ok') for line in table))
+        self.assertIn('Rows/s', stdout.getvalue())
+        self.assertEqual(Word.objects.count(), 2)
+
+    def test_unchanged_words_are_skipped_by_hash(self):
+        path = self.write('words.json', [('Haus', 'house'), ('Hund', 'dog')])
+        self.populate(path)
+        word = Word.objects.get(word='Haus')
+        self.assertTrue(word.content_hash)
+
+        with CaptureQueriesContext(connection) as queries:
+            ok, result = self.populate(path)
+        self.assertTrue(ok)
+        self.assertEqual((result['new'], result['updated'], result['unchanged']), (0, 0, 2))
+        # only the keys of the run are written, to a temporary table
+        self.assertFalse([q for q in queries.captured_queries
+                          if q['sql'].startswith(('INSERT', 'UPDATE')) and seen_keys.TABLE not in q['sql']])
+
+        self.write('words.json', [('Haus', 'home'), ('Hund', 'dog')])
+        ok, result = self.populate(path)
+        self.assertEqual((result['new'], result['updated'], result['unchanged']), (0, 1, 1))
+        word.refresh_from_db()
+        self.assertEqual(word.translation, 'home')
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write('words.json', [('Haus', 'house'), ('Hund', 'dog')])
+        ok, result = self.populate(path, dry_run=True)
+        self.assertTrue(ok)
+        self.assertEqual(result['new'], 2)
+        self.assertFalse(Word.objects.exists())
+        self.assertFalse(LanguageLevel.objects.exists())
+        self.assertFalse(VocabularyList.objects.exists())
+
+        self.populate(path)
+        self.write('words.json', [('Haus', 'home'), ('Katze', 'cat')])
+        populator = VocabPopulator(stdout=StringIO(), stderr=StringIO(), quiet=True, dry_run=True)
+        populator.import_from_json(path)
+        result = populator.results[-1]
+        self.assertEqual((result['new'], result['updated'], result['unchanged'], populator.removed), (1, 1, 0, 1))
+        self.assertEqual(set(Word.objects.values_list('word', 'translation')), {('Haus', 'house'), ('Hund', 'dog')})
+
+    def test_missing_words_are_deleted_only_with_delete_missing(self):
+        path = self.write('words.json', [('Haus', 'house'), ('Hund', 'dog')])
+        self.populate(path)
+        user = get_user_model().objects.create_user(username='learner', password='pw')
+        Progress.objects.create(user=user, word=Word.objects.get(word='Hund'), correct_count=1)
+        self.write('words.json', [('Haus', 'house')])
+
+        self.populate(path)
+        self.assertTrue(Word.objects.filter(word='Hund').exists())
+
+        populator = VocabPopulator(stdout=StringIO(), stderr=StringIO(), quiet=True, delete_missing=True, batch_size=1)
+        self.assertTrue(populator.import_from_json(path))
+        self.assertEqual((populator.results[-1]['unchanged'], populator.removed), (1, 1))
+        self.assertEqual(list(Word.objects.values_list('word', flat=True)), ['Haus'])
+        self.assertFalse(Progress.objects.exists())
+
+    def test_delete_missing_keeps_the_words_of_every_source_of_the_run(self):
+        first = self.write('first.json', [('Haus', 'house'), ('Hund', 'dog')])
+        second = self.write('second.json', [('Katze', 'cat')])
+        self.assertTrue(VocabPopulator(stdout=StringIO(), stderr=StringIO(), quiet=True).import_files([first, second]))
+        Word.objects.create(word='Maus', translation='mouse', vocab_list=VocabularyList.objects.get(name='System List A1'))
+
+        stdout = StringIO()
+        populator = VocabPopulator(stdout=stdout, stderr=StringIO(), quiet=True, dry_run=True, delete_missing=True)
+        populator.import_files([first, second])
+        self.assertEqual(populator.removed, 1)
+        self.assertIn('1 words of the imported lists would be removed', stdout.getvalue())
+
+        populator = VocabPopulator(stdout=StringIO(), stderr=StringIO(), quiet=True, delete_missing=True)
+        self.assertTrue(populator.import_files([first, second]))
+        self.assertEqual(populator.removed, 1)
+        self.assertEqual(set(Word.objects.values_list('word', flat=True)), {'Haus', 'Hund', 'Katze'})
+
+    def test_delete_missing_removes_nothing_if_a_file_fails(self):
+        first = self.write('first.json', [('Haus', 'house')])
+        second = self.write('second.json', [('Katze', 'cat')])
+        VocabPopulator(stdout=StringIO(), stderr=StringIO(), quiet=True).import_files([first, second])
+        with open(second, 'w', encoding='utf-8') as f:
+            f.write('{"words": [')
+
+        stderr = StringIO()
+        populator = VocabPopulator(stdout=StringIO(), stderr=stderr, quiet=True, delete_missing=True)
+        self.assertFalse(populator.import_files([first, second]))
+        self.assertIn('Missing words were not removed', stderr.getvalue())
+        self.assertEqual(set(Word.objects.values_list('word', flat=True)), {'Haus', 'Katze'})
+
+    def test_duplicates_across_batches_do_not_flip_flop(self):
+        path = self.write('words.json', [('an sein', 'to be on'), ('Haus', 'house'), ('an sein', 'to be switched on')])
+        ok, result = self.populate(path, batch_size=2)
+        self.assertTrue(ok)
+        self.assertEqual((result['new'], result['duplicates']), (2, 1))
+        # the first occurrence wins
+        self.assertEqual(Word.objects.get(word='an sein').translation, 'to be on')
+
+        _, result = self.populate(path, batch_size=2)
+        self.assertEqual((result['new'], result['updated'], result['unchanged']), (0, 0, 2))
+        _, result = self.populate(path, batch_size=2, dry_run=True)
+        self.assertEqual(result['updated'], 0)
+
+    def test_duplicates_across_files_of_a_run_do_not_flip_flop(self):
+        first = self.write('first.json', [('an sein', 'to be on'), ('Haus', 'house')])
+        second = self.write('second.json', [('Hund', 'dog'), ('an sein', 'to be switched on')])
+        for _ in range(2):
+            populator = VocabPopulator(stdout=StringIO(), stderr=StringIO(), quiet=True)
+            self.assertTrue(populator.import_files([first, second]))
+            self.assertEqual([(r['updated'], r['duplicates']) for r in populator.results], [(0, 0), (0, 1)])
+        self.assertEqual(Word.objects.get(word='an sein').translation, 'to be on')
+
+
+class UserListProgressTests(LearnerTestCase):
+    word_count = 3
+    word_format = 'word-{i}'
+    translation_format = 'translation {i}'
+
+    def setUp(self):
+        self.service = LessonService(self.user, self.vocab_list)
+        self.today = timezone.localdate()
+
+    def summary(self):
+        return UserListProgress.objects.get(user=self.user, vocab_list=self.vocab_list)
+
+    def assertMatchesProgress(self, row):
+        expected = list_progress.compute(self.user, [self.vocab_list.pk])[self.vocab_list.pk]
+        for field in list_progress.SUMMARY_FIELDS:
+            self.assertEqual(getattr(row, field), getattr(expected, field), field)
+
+    def test_answers_update_the_row_incrementally(self):
+        self.service.update_progress(self.words[0], True)
+        row = self.summary()
+        self.assertEqual((row.total_words, row.learned_words, row.in_progress_words), (3, 0, 1))
+
+        for _ in range(LEARNED_THRESHOLD - 1):
+            self.service.update_progress(self.words[0], True)
+        self.service.update_progress(self.words[1], True)
+        self.service.update_progress(self.words[2], False)
+
+        row = self.summary()
+        self.assertEqual((row.learned_words, row.in_progress_words), (1, 1))
+        self.assertEqual(row.last_learned, self.today)
+        self.assertIsNone(row.unlocks_on)
+        self.assertMatchesProgress(row)
+
+    def test_completing_the_list_sets_the_unlock_date(self):
+        list_progress.get_summaries(self.user, [self.vocab_list.pk])
+        for word in self.words:
+            for _ in range(LEARNED_THRESHOLD):
+                self.service.update_progress(word, True)
+
+        row = self.summary()
+        self.assertEqual(row.learned_words, 3)
+        self.assertEqual(row.unlocks_on, self.today + timedelta(days=LOCK_DAYS))
+        self.assertMatchesProgress(row)
+
+    def test_rows_of_other_users_lists_stay_up_to_date(self):
+        owner = get_user_model().objects.create_user(username='owner', password='pw')
+        shared = VocabularyList.objects.create(name='Shared', level=self.vocab_list.level, created_by=owner, is_system=False)
+        shared.words.add(self.words[0])
+        # the learner looks at the other user's list, which builds a row
+        self.client.force_login(self.user)
+        self.client.get(reverse('list_detail', args=[shared.pk]))
+        self.assertTrue(UserListProgress.objects.filter(user=self.user, vocab_list=shared).exists())
+
+        for _ in range(LEARNED_THRESHOLD):
+            self.service.update_progress(self.words[0], True)
+        row = UserListProgress.objects.get(user=self.user, vocab_list=shared)
+        self.assertEqual((row.learned_words, row.in_progress_words), (1, 0))
+        call_command('rebuild_list_progress', '--verify', stdout=StringIO(), stderr=StringIO())
+
+    def test_adding_and_removing_words_refreshes_the_row(self):
+        for word in self.words:
+            Progress.objects.create(user=self.user, word=word, correct_count=LEARNED_THRESHOLD, last_correct=self.today)
+        self.assertIsNotNone(list_progress.get_summaries(self.user, [self.vocab_list.pk])[self.vocab_list.pk].unlocks_on)
+
+        Word.objects.create(word='new', translation='new', vocab_list=self.vocab_list)
+        row = self.summary()
+        self.assertEqual(row.total_words, 4)
+        self.assertIsNone(row.unlocks_on)
+
+        self.words[0].delete()
+        row = self.summary()
+        self.assertEqual((row.total_words, row.learned_words), (3, 2))
+        self.assertMatchesProgress(row)
+
+    def test_editing_a_word_only_invalidates_caches(self):
+        reference.invalidate()
+        with mock.patch.object(list_progress, 'refresh_lists') as refresh_lists, \
+                mock.patch.object(autocomplete, 'invalidate') as invalidate_autocomplete, \
+                mock.patch.object(distractors, 'invalidate') as invalidate_distractors:
+            self.words[0].translation = 'changed'
+            self.words[0].save()
+        refresh_lists.assert_not_called()
+        invalidate_autocomplete.assert_called_once_with()
+        invalidate_distractors.assert_called_once_with([self.vocab_list.pk])
+
+    def test_rebuild_command_verifies_and_fixes_rows(self):
+        self.service.update_progress(self.words[0], True)
+        UserListProgress.objects.update(learned_words=2)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_list_progress', '--verify', stdout=StringIO(), stderr=StringIO())
+
+        call_command('rebuild_list_progress', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_list_progress', '--verify', stdout=out, stderr=StringIO())
+        self.assertIn('all up to date', out.getvalue())
+        self.assertMatchesProgress(self.summary())
+
+
+class ListMetricsServiceTests(LearnerTestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+
+    def add_list(self, name, size):
+        vocab_list = VocabularyList.objects.create(name=name, level=self.level, created_by=self.user)
+        return vocab_list, add_words(vocab_list, size, word=f'{name}-{{i}}')
+
+    def test_metrics(self):
+        vocab_list, words = self.add_list('Food', 4)
+        Progress.objects.create(user=self.user, word=words[0], correct_count=LEARNED_THRESHOLD, last_correct=self.today)
+        Progress.objects.create(
+            user=self.user, word=words[1], correct_count=LEARNED_THRESHOLD, last_correct=self.today - timedelta(days=1)
+        )
+        Progress.objects.create(user=self.user, word=words[2], correct_count=1, last_correct=self.today)
+
+        metrics = ListMetricsService(self.user).for_list(vocab_list)
+
+        self.assertEqual(metrics['total_words'], 4)
+        self.assertEqual(metrics['learned_words'], 2)
+        self.assertEqual(metrics['in_progress_words'], 1)
+        self.assertEqual(metrics['learned_today'], 1)
+        self.assertEqual(metrics['progress_percent'], 50.0)
+        self.assertFalse(metrics['is_locked'])
+
+    def test_query_count_does_not_depend_on_list_count(self):
+        service = ListMetricsService(self.user)
+        own_lists = VocabularyList.objects.filter(created_by=self.user)
+        for count in (1, 8):
+            while own_lists.count() < count:
+                _, words = self.add_list(f'List {own_lists.count()}', 5)
+                Progress.objects.create(user=self.user, word=words[0], correct_count=LEARNED_THRESHOLD, last_correct=self.today)
+            lists = own_lists.order_by('pk')
+            # the first call builds the missing summary rows
+            service.for_lists(lists)
+            # lists with their summary rows, words learned today
+            with self.assertNumQueries(2):
+                metrics = service.for_lists(lists)
+            self.assertEqual(len(metrics), count)
+            self.assertTrue(all(item['learned_today'] == 1 for item in metrics))
+
+
+class NavListsTests(LearnerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        VocabularyList.objects.create(name='Mine', level=cls.level, created_by=cls.user, is_system=False)
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def names(self):
+        context = nav_lists(self.request)
+        return [vlist.name for vlist in context['system_lists']], [vlist.name for vlist in context['custom_lists']]
+
+    def test_lists_are_lazy_and_cached(self):
+        with self.assertNumQueries(0):
+            nav_lists(self.request)
+        self.assertEqual(self.names(), (['System List A1'], ['Mine']))
+        with self.assertNumQueries(0):
+            self.names()
+
+    def test_saving_a_list_invalidates_the_cache(self):
+        self.names()
+        VocabularyList.objects.create(name='Also mine', level=self.level, created_by=self.user, is_system=False)
+        self.assertEqual(self.names(), (['System List A1'], ['Mine', 'Also mine']))
+
+        self.level.code = 'A2'
+        self.level.save()
+        [system_list] = nav_lists(self.request)['system_lists']
+        self.assertEqual(system_list.level.code, 'A2')
+
+
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        self.level = LanguageLevel.objects.create(code='B1', description='Level B1')
+        LanguageLevel.objects.create(code='A1', description='Level A1')
+
+    def test_levels_are_loaded_once(self):
+        reference.get_levels()
+        with self.assertNumQueries(0):
+            self.assertEqual([level.code for level in reference.get_levels()], ['A1', 'B1'])
+            self.assertEqual(reference.get_level('B1'), self.level)
+
+    def test_changes_refresh_the_registry(self):
+        reference.get_levels()
+        LanguageLevel.objects.create(code='A2', description='Level A2')
+        system_list = VocabularyList.objects.create(name='System List B1', level=self.level)
+
+        self.assertEqual([level.code for level in reference.get_levels()], ['A1', 'A2', 'B1'])
+        self.assertEqual(reference.get_system_list('System List B1', self.level, None), system_list)
+
+    def test_changes_made_by_other_processes_show_up_after_max_age(self):
+        reference.get_levels()
+        # e.g. import_vocab, whose version bump does not reach a per-process cache
+        LanguageLevel.objects.bulk_create([LanguageLevel(code='A2', description='Level A2')])
+        self.assertEqual([level.code for level in reference.get_levels()], ['A1', 'B1'])
+        with mock.patch('vocab.reference.time.monotonic', return_value=time.monotonic() + reference.MAX_AGE):
+            self.assertEqual([level.code for level in reference.get_levels()], ['A1', 'A2', 'B1'])
+
+    def test_profile_form_renders_levels_without_queries(self):
+        from users.forms import ProfileUpdateForm
+
+        reference.get_levels()
+        form = ProfileUpdateForm()
+        with self.assertNumQueries(0):
+            html = str(form['level'])
+        self.assertIn('>B1</option>', html)
+
+
+@skipUnlessDBFeature('supports_explaining_query_execution')
+class IndexUsageTests(LearnerTestCase):
+    """The hot queries are answered from the indexes declared on Progress and Word."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.word = Word.objects.create(word='Haus', translation='house', vocab_list=cls.vocab_list)
+
+    def assertUsesIndex(self, queryset, table, columns):
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            # e.g. "SEARCH vocab_progress USING INDEX name (user_id=? AND word_id=?)"
+            self.assertRegex(plan, rf'SEARCH {table} USING (COVERING )?INDEX \S+ \({columns}')
+        else:
+            self.assertNotIn(f'Seq Scan on {table}', plan)
+
+    def test_mastered_today_uses_index(self):
+        queryset = Progress.objects.filter(
+            user=self.user, last_correct=timezone.localdate(), correct_count__gte=LEARNED_THRESHOLD
+        )
+        self.assertUsesIndex(queryset, 'vocab_progress', r'user_id=\? AND last_correct=\? AND correct_count>')
+
+    def test_lesson_words_use_indexes(self):
+        queryset = LessonService(self.user, self.vocab_list).get_words()
+        self.assertUsesIndex(queryset, 'vocab_listmembership', r'vocab_list_id=\?')
+        self.assertUsesIndex(queryset, 'U0', r'user_id=\? AND word_id=\?')
+
+    def test_importer_lookup_uses_index(self):
+        queryset = Word.objects.filter(vocab_list=self.vocab_list, word__in=['Haus', 'Baum'])
+        self.assertUsesIndex(queryset, 'vocab_word', r'vocab_list_id=\? AND word=\?')
+
+    def test_progress_is_unique_per_user_and_word(self):
+        Progress.objects.create(user=self.user, word=self.word)
+        with self.assertRaises(IntegrityError):
+            Progress.objects.create(user=self.user, word=self.word)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        level = LanguageLevel.objects.create(code='A1', description='Level A1')
+        vocab_list = VocabularyList.objects.create(name='System List A1', level=level)
+        # repeated words are ordered by pk
+        Word.objects.bulk_create([
+            Word(word=text, translation=text, vocab_list=vocab_list)
+            for text in ['Baum', 'Apfel', 'Haus', 'Apfel', 'Zug', 'Baum', 'Katze']
+        ])
+        self.expected = list(Word.objects.order_by('word', 'pk'))
+        self.paginator = KeysetPaginator(Word.objects.all(), per_page=3, with_count=True)
+
+    def test_walk_forward_and_back(self):
+        pages = [self.paginator.page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.page(after=pages[-1].next_cursor))
+        self.assertEqual([word for page in pages for word in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous())
+        self.assertEqual(pages[0].count, 7)
+
+        previous = self.paginator.page(before=pages[-1].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        first = self.paginator.page(before=previous.previous_cursor)
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertFalse(first.has_previous())
+
+    def test_invalid_cursor_returns_the_first_page(self):
+        self.assertEqual(list(self.paginator.page(after='not a cursor')), self.expected[:3])
+
+    def test_cursor_values_of_the_wrong_type_are_ignored(self):
+        for values in (['a', 'x'], [None, None], [['a'], 1], ['a', {'pk': 1}], ['a', True], [1, 1]):
+            cursor = encode_cursor(values)
+            self.assertEqual(list(self.paginator.page(after=cursor)), self.expected[:3], values)
+            self.assertEqual(list(self.paginator.page(before=cursor)), self.expected[:3], values)
+
+        user = get_user_model().objects.create_user(username='learner', password='pw')
+        self.client.force_login(user)
+        response = self.client.get(reverse('vocabulary'), {'after': encode_cursor(['a', 'x'])})
+        self.assertEqual(response.status_code, 200)
+        vocab_list = VocabularyList.objects.get()
+        response = self.client.get(reverse('list_words', args=[vocab_list.pk]), {'after': encode_cursor([None, None])})
+        self.assertEqual(response.status_code, 200)
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_deep_pages_seek_in_the_index(self):
+        page = self.paginator.page()
+        queryset = Word.objects.order_by('word', 'pk').filter(
+            self.paginator._beyond([page.object_list[-1].word, page.object_list[-1].pk], 'gt')
+        )
+        if connection.vendor == 'sqlite':
+            self.assertIn('SEARCH vocab_word USING INDEX word_word_idx (word>?)', queryset.explain())
+
+
+class WordSearchTests(LearnerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        b1 = LanguageLevel.objects.create(code='B1', description='Level B1')
+        cls.b1_list = VocabularyList.objects.create(name='System List B1', level=b1)
+        cls.bahnhof = Word.objects.create(
+            word='Bahnhof', translation='train station', example='Der Zug steht am Bahnhof.', vocab_list=cls.vocab_list
+        )
+        cls.haus = Word.objects.create(word='Haus', translation='house', vocab_list=cls.vocab_list)
+        cls.hausarbeit = Word.objects.create(word='Hausarbeit', translation='housework', vocab_list=cls.b1_list)
+
+    def test_signals_keep_the_index_in_sync(self):
+        self.assertEqual(search.search_word_ids('Bahnhof'), [self.bahnhof.pk])
+        self.bahnhof.translation = 'railway station'
+        self.bahnhof.save()
+        self.assertEqual(search.search_word_ids('railway'), [self.bahnhof.pk])
+        self.bahnhof.delete()
+        self.assertEqual(search.search_word_ids('Bahnhof'), [])
+
+    def test_prefix_example_and_level_filter(self):
+        self.assertEqual(search.search_word_ids('hau'), [self.haus.pk, self.hausarbeit.pk])
+        self.assertEqual(search.search_word_ids('Zug'), [self.bahnhof.pk])
+        a1_words = Word.objects.filter(vocab_list__level=self.level)
+        self.assertEqual(search.search_word_ids('hau', within=a1_words), [self.haus.pk])
+
+    def test_typos_are_tolerated(self):
+        self.assertEqual(search.search_word_ids('Bahnhfo'), [self.bahnhof.pk])
+        self.assertEqual(search.search_word_ids('trian station'), [self.bahnhof.pk])
+
+    def test_imported_words_are_indexed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'words.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'words': [{'word': 'Schmetterling', 'translation': 'butterfly', 'details': {'level': 'A1'}}]}, f)
+            VocabPopulator(stdout=StringIO(), stderr=StringIO(), quiet=True).import_from_json(path)
+        [word] = search.search_words('butterfly')
+        self.assertEqual(word.word, 'Schmetterling')
+
+    def test_json_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('word_search'), {'q': 'haus', 'level': 'A1'})
+        self.assertEqual(response.status_code, 200)
+        [result] = response.json()['results']
+        self.assertEqual((result['word'], result['level']), ('Haus', 'A1'))
+
+
+class AutocompleteTests(LearnerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        b1 = LanguageLevel.objects.create(code='B1', description='Level B1')
+        cls.b1_list = VocabularyList.objects.create(name='System List B1', level=b1)
+        cls.haus = Word.objects.create(word='Haus', translation='house', vocab_list=cls.vocab_list)
+        cls.hund = Word.objects.create(word='Hund', translation='dog', vocab_list=cls.vocab_list)
+        cls.ueber = Word.objects.create(word='über', translation='over', vocab_list=cls.vocab_list)
+        Word.objects.create(word='Hausarbeit', translation='housework', vocab_list=cls.b1_list)
+
+    def setUp(self):
+        autocomplete.invalidate()
+
+    def complete(self, prefix, vocab_list=None, limit=autocomplete.AUTOCOMPLETE_LIMIT):
+        return [row[1] for row in autocomplete.complete(vocab_list or self.vocab_list, prefix, limit)]
+
+    def test_prefix_lookup(self):
+        self.assertEqual(self.complete('h'), ['Haus', 'Hund'])
+        self.assertEqual(self.complete('HOU'), ['Haus'])
+        self.assertEqual(self.complete('uber'), ['über'])
+        self.assertEqual(self.complete('h', limit=1), ['Haus'])
+        self.assertEqual(self.complete('hausa'), [])
+        self.assertEqual(self.complete('hausa', self.b1_list), ['Hausarbeit'])
+
+    def test_index_is_built_once_and_rebuilt_after_changes(self):
+        self.complete('h')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.complete('h'), ['Haus', 'Hund'])
+        Word.objects.create(word='Hut', translation='hut', vocab_list=self.vocab_list)
+        self.assertEqual(self.complete('h'), ['Haus', 'Hund', 'Hut'])
+
+    def test_index_expires_after_max_age(self):
+        self.complete('h')
+        # written by another process (import_vocab) whose version bump does not reach this one
+        word = Word.objects.bulk_create([Word(word='Hut', translation='hut', vocab_list=self.vocab_list)])[0]
+        ListMembership.objects.bulk_create([ListMembership(vocab_list=self.vocab_list, word=word)])
+        self.assertEqual(self.complete('h'), ['Haus', 'Hund'])
+        with mock.patch('vocab.autocomplete.time.monotonic', return_value=time.monotonic() + autocomplete.MAX_AGE):
+            self.assertEqual(self.complete('h'), ['Haus', 'Hund', 'Hut'])
+
+    def test_import_rebuilds_the_index(self):
+        self.complete('s')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'words.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'words': [{'word': 'Schule', 'translation': 'school', 'details': {'level': 'A1'}}]}, f)
+            call_command('import_vocab', path, quiet=True, stdout=StringIO())
+        vocab_list = VocabularyList.objects.get(words__word='Schule')
+        self.assertEqual(self.complete('sch', vocab_list), ['Schule'])
+
+    def test_custom_lists(self):
+        custom = VocabularyList.objects.create(name='Mine', level=self.level, created_by=self.user, is_system=False)
+        Word.objects.create(word='Haus', translation='house', vocab_list=custom)
+        self.assertEqual(self.complete('ha', custom), ['Haus'])
+
+    def test_endpoint_and_create_page(self):
+        other = get_user_model().objects.create_user(username='other', password='pw')
+        private = VocabularyList.objects.create(name='Private', level=self.level, created_by=other, is_system=False)
+        self.client.force_login(self.user)
+        url = reverse('word_autocomplete')
+        response = self.client.get(url, {'list': self.vocab_list.pk, 'q': 'hu'})
+        self.assertEqual(response.json()['results'], [
+            {'id': self.hund.pk, 'word': 'Hund', 'translation': 'dog', 'word_type': None},
+        ])
+        self.assertEqual(self.client.get(url, {'list': private.pk}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'list': 'x'}).status_code, 404)
+
+        response = self.client.get(reverse('create_list'), {'from': self.vocab_list.pk})
+        self.assertContains(response, 'data-list-id="%d"' % self.vocab_list.pk)
+        self.assertNotContains(response, 'Hund')
+
+
+class ListMembershipTests(LearnerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.haus = Word.objects.create(word='Haus', translation='house', vocab_list=cls.vocab_list)
+        cls.hund = Word.objects.create(word='Hund', translation='dog', vocab_list=cls.vocab_list)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_list(self, *words):
+        self.client.post(reverse('create_list'), {
+            'name': 'Mine', 'level': self.level.pk, 'words': [word.pk for word in words],
+        })
+        return VocabularyList.objects.get(name='Mine')
+
+    def test_created_lists_share_the_words(self):
+        custom = self.create_list(self.haus)
+        self.assertEqual(Word.objects.count(), 2)
+        self.assertEqual(list(custom.words.all()), [self.haus])
+        self.assertEqual(set(self.haus.lists.all()), {self.vocab_list, custom})
+
+    def test_progress_counts_in_every_list(self):
+        custom = self.create_list(self.haus, self.hund)
+        service = LessonService(self.user, self.vocab_list)
+        for _ in range(LEARNED_THRESHOLD):
+            service.update_progress(self.haus, True)
+        summaries = list_progress.get_summaries(self.user, [self.vocab_list.pk, custom.pk])
+        self.assertEqual(summaries[custom.pk].learned_words, 1)
+        self.assertEqual(summaries[self.vocab_list.pk].learned_words, 1)
+        self.assertEqual(list(LessonService(self.user, custom).get_words()), [self.hund])
+
+    def test_editing_a_shared_word_copies_it(self):
+        custom = self.create_list(self.haus)
+        copy = memberships.edit_word(custom, self.haus, translation='home')
+        self.haus.refresh_from_db()
+        self.assertEqual(self.haus.translation, 'house')
+        self.assertNotEqual(copy.pk, self.haus.pk)
+        self.assertEqual(list(custom.words.all()), [copy])
+        self.assertEqual(list(self.vocab_list.words.order_by('word')), [self.haus, self.hund])
+
+        # the copy belongs to the list and is edited in place
+        self.assertEqual(memberships.edit_word(custom, copy, translation='house, home').pk, copy.pk)
+        with self.assertRaises(ValueError):
+            memberships.edit_word(self.vocab_list, self.haus, translation='home')
+
+    def test_adding_and_removing_words_refreshes_the_summary(self):
+        custom = self.create_list(self.haus)
+        self.assertEqual(list_progress.get_summaries(self.user, [custom.pk])[custom.pk].total_words, 1)
+        custom.words.add(self.hund)
+        self.assertEqual(UserListProgress.objects.get(vocab_list=custom).total_words, 2)
+        self.hund.delete()
+        self.assertEqual(UserListProgress.objects.get(vocab_list=custom).total_words, 1)
+
+
+class WordPickerTests(LearnerTestCase):
+    word_count = 5
+    word_format = 'Wort{i}'
+    translation_format = 'word {i}'
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_list(self, **selection):
+        return self.client.post(reverse('create_list'), {
+            'name': 'Mine', 'level': self.level.pk, 'source': self.vocab_list.pk, **selection,
+        })
+
+    def picked(self):
+        return [word.word for word in VocabularyList.objects.get(name='Mine').words.order_by('word')]
+
+    def test_pages_with_cursor_and_fields(self):
+        url = reverse('list_words', args=[self.vocab_list.pk])
+        first = self.client.get(url, {'limit': 2}).json()
+        self.assertEqual(first['results'], [
+            {'pk': self.words[0].pk, 'word': 'Wort0', 'translation': 'word 0'},
+            {'pk': self.words[1].pk, 'word': 'Wort1', 'translation': 'word 1'},
+        ])
+        self.assertIsNone(first['previous'])
+        second = self.client.get(url, {'limit': 2, 'after': first['next'], 'fields': 'pk,word'}).json()
+        self.assertEqual(second['results'], [{'pk': self.words[2].pk, 'word': 'Wort2'}, {'pk': self.words[3].pk, 'word': 'Wort3'}])
+        other = get_user_model().objects.create_user(username='other', password='pw')
+        private = VocabularyList.objects.create(name='Private', level=self.level, created_by=other, is_system=False)
+        self.assertEqual(self.client.get(reverse('list_words', args=[private.pk])).status_code, 404)
+
+    def test_post_ranges(self):
+        first, second = self.words[0].pk, self.words[1].pk
+        self.create_list(word_ranges=memberships.format_ranges([first, second, self.words[4].pk]))
+        self.assertEqual(self.picked(), ['Wort0', 'Wort1', 'Wort4'])
+
+    def test_post_all_words_minus_exclusions(self):
+        self.create_list(all_words='1', exclude=str(self.words[2].pk))
+        self.assertEqual(self.picked(), ['Wort0', 'Wort1', 'Wort3', 'Wort4'])
+
+    def test_invalid_selection_keeps_the_form(self):
+        response = self.create_list(word_ranges='9-3')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'value="9-3"')
+        self.assertFalse(VocabularyList.objects.filter(name='Mine').exists())
+
+    def test_ranges_are_merged(self):
+        ranges = memberships.parse_ranges('5-9, 1-3,4,20,8-12')
+        self.assertEqual(ranges, [(1, 12), (20, 20)])
+        self.assertTrue(memberships.in_ranges(ranges, 12))
+        self.assertFalse(memberships.in_ranges(ranges, 13))
+        self.assertEqual(memberships.format_ranges([1, 2, 3, 7, 9, 10]), '1-3,7,9-10')
+
+
+class DeletionTests(LearnerTestCase):
+    word_count = 60
+    word_format = 'Wort{i}'
+    translation_format = 'word {i}'
+
+    def custom_list(self, size):
+        vocab_list = VocabularyList.objects.create(
+            name=f'Mine {size}', level=self.level, created_by=self.user, is_system=False
+        )
+        memberships.add_words(vocab_list, [word.pk for word in self.words[:size]])
+        copy = memberships.edit_word(vocab_list, self.words[0], translation='edited')
+        for word in [copy, *self.words[1:size]]:
+            Progress.objects.get_or_create(user=self.user, word=word, defaults={'correct_count': 1})
+        self.user.active_lists.add(vocab_list)
+        list_progress.get_summaries(self.user, [vocab_list.pk])
+        return vocab_list, copy
+
+    def test_delete_list_view(self):
+        vocab_list, copy = self.custom_list(5)
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('delete_list', args=[vocab_list.pk]))
+        self.assertRedirects(response, reverse('vocab_lists'))
+        self.assertFalse(VocabularyList.objects.filter(pk=vocab_list.pk).exists())
+        self.assertFalse(Word.objects.filter(pk=copy.pk).exists())
+        self.assertFalse(self.user.active_lists.exists())
+        self.assertFalse(UserListProgress.objects.filter(vocab_list_id=vocab_list.pk).exists())
+        # the shared words and the progress on them stay
+        self.assertEqual(self.vocab_list.words.count(), 60)
+        self.assertEqual(Progress.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(search.search_word_ids('edited'), [])
+
+    def test_query_count_does_not_depend_on_list_size(self):
+        small, _ = self.custom_list(3)
+        large, _ = self.custom_list(50)
+        with CaptureQueriesContext(connection) as small_queries:
+            deletion.delete_lists([small])
+        with CaptureQueriesContext(connection) as large_queries:
+            deletion.delete_lists([large])
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_delete_user(self):
+        vocab_list, _ = self.custom_list(5)
+        deletion.delete_user(self.user)
+        self.assertFalse(get_user_model().objects.filter(username='learner').exists())
+        self.assertFalse(VocabularyList.objects.filter(pk=vocab_list.pk).exists())
+        self.assertFalse(Progress.objects.exists())
+        self.assertFalse(UserListProgress.objects.exists())
+        self.assertEqual(Word.objects.count(), 60)
+
+    def test_admin_action(self):
+        vocab_list, _ = self.custom_list(5)
+        admin = get_user_model().objects.create_superuser(username='admin', password='pw')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:vocab_vocabularylist_changelist'), {
+            'action': 'delete_lists', '_selected_action': [vocab_list.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(VocabularyList.objects.filter(pk=vocab_list.pk).exists())
+        self.assertTrue(VocabularyList.objects.filter(pk=self.vocab_list.pk).exists())
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(username='admin', password='pw')
+        self.level = LanguageLevel.objects.create(code='A1', description='Level A1')
+        self.system_list = VocabularyList.objects.create(name='System List A1', level=self.level)
+        self.haus = Word.objects.create(word='Haus', translation='house', vocab_list=self.system_list)
+        self.client.force_login(self.admin)
+
+    def add_rows(self, n):
+        for i in range(n):
+            learner = get_user_model().objects.create_user(username=f'learner{len(get_user_model().objects.all())}')
+            vocab_list = VocabularyList.objects.create(name=f'List {i}', level=self.level, created_by=learner, is_system=False)
+            word = Word.objects.create(word=f'Wort{vocab_list.pk}', translation='word', vocab_list=vocab_list)
+            Progress.objects.create(user=learner, word=word, level=self.level)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelist_query_counts_do_not_depend_on_row_count(self):
+        urls = [reverse(f'admin:vocab_{model}_changelist') for model in ('vocabularylist', 'word', 'progress')]
+        self.add_rows(2)
+        before = [self.count_queries(url) for url in urls]
+        self.add_rows(5)
+        self.assertEqual([self.count_queries(url) for url in urls], before)
+
+    def test_list_page_links_to_its_words(self):
+        Word.objects.create(word='Hund', translation='dog', vocab_list=self.system_list)
+        response = self.client.get(reverse('admin:vocab_vocabularylist_change', args=[self.system_list.pk]))
+        self.assertContains(response, '2 words')
+        self.assertNotContains(response, 'name="words-0-word"')
+        response = self.client.get(reverse('admin:vocab_word_changelist'), {'lists__id__exact': self.system_list.pk})
+        self.assertEqual([word.word for word in response.context['cl'].result_list], ['Hund', 'Haus'])
+
+    def test_word_search_uses_the_search_index(self):
+        Word.objects.create(word='Bahnhof', translation='train station', vocab_list=self.system_list)
+        response = self.client.get(reverse('admin:vocab_word_changelist'), {'q': 'bahnhfo'})
+        self.assertEqual([word.word for word in response.context['cl'].result_list], ['Bahnhof'])
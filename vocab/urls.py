@@ -6,6 +6,9 @@ urlpatterns = [
     path('lists/<int:pk>/', views.ListDetailView.as_view(), name='list_detail'),
     path('lists/create/', views.CreateListView.as_view(), name='create_list'),
     path('lists/<int:pk>/delete/', views.DeleteListView.as_view(), name='delete_list'),
+    path('lists/<int:pk>/words/', views.ListWordsView.as_view(), name='list_words'),
     path('vocabulary/', views.VocabularyView.as_view(), name='vocabulary'),
+    path('vocabulary/search/', views.WordSearchView.as_view(), name='word_search'),
+    path('vocabulary/autocomplete/', views.WordAutocompleteView.as_view(), name='word_autocomplete'),
     path('lists/<int:pk>/start/<str:mode>/', views.StartLessonView.as_view(), name='set_active_list_and_start'),
 ]
\ No newline at end of file
@@ -1,16 +1,16 @@
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, DeleteView
 from django.urls import reverse_lazy, reverse
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Subquery, OuterRef, IntegerField, Value, Max
+from django.db.models import Q, Subquery, OuterRef, IntegerField, Value
 from django.db.models.functions import Coalesce
-from .models import LanguageLevel, VocabularyList, Word, Progress
+from .models import VocabularyList, Word, Progress
+from . import autocomplete, deletion, memberships, reference, search
+from .pagination import KeysetPaginator
+from .services import ListMetricsService
 from django.views import View
-from django.utils import timezone
-from datetime import timedelta
-
-from sprachlernen.constants import LEARNED_THRESHOLD, LOCK_DAYS
 
 
 class VocabListView(LoginRequiredMixin, ListView):
@@ -28,97 +28,17 @@ class VocabListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         level = self.request.GET.get('level')
-        today = timezone.localdate()
-        custom_qs = VocabularyList.objects.filter(created_by=self.request.user, is_system=False).select_related('level')
+        custom_qs = VocabularyList.objects.filter(created_by=self.request.user, is_system=False)
         if level:
             custom_qs = custom_qs.filter(level__code=level)
-        # build metrics for custom lists
-        custom_lists_with_metrics = []
-        for vlist in custom_qs:
-            total_words = vlist.words.count()
-            # number of words that reached the learned threshold
-            learned_count = Progress.objects.filter(
-                user=self.request.user, word__vocab_list=vlist, correct_count__gte=LEARNED_THRESHOLD
-            ).count()
-            # Count only learned words (correct_count >= LEARNED_THRESHOLD)
-            learned_all = learned_count
-            # Count only those mastered today
-            learned_today = Progress.objects.filter(
-                user=self.request.user,
-                word__vocab_list=vlist,
-                last_correct=today,
-                correct_count__gte=LEARNED_THRESHOLD,
-            ).count()
-            progress_percent = round((learned_all / total_words) * 100, 1) if total_words > 0 else 0.0
-            # determine lock state: if all words learned -> locked until last_learned + LOCK_DAYS
-            is_locked = False
-            unlock_in_days = 0
-            if total_words > 0 and learned_count == total_words:
-                last_learned = Progress.objects.filter(
-                    user=self.request.user, word__vocab_list=vlist, correct_count__gte=LEARNED_THRESHOLD
-                ).aggregate(max_date=Max('last_correct'))['max_date']
-                if last_learned:
-                    next_available = last_learned + timedelta(days=LOCK_DAYS)
-                    delta = (next_available - today).days
-                    if delta > 0:
-                        is_locked = True
-                        unlock_in_days = delta
-
-            custom_lists_with_metrics.append({
-                'pk': vlist.pk,
-                'name': vlist.name,
-                'total_words': total_words,
-                'learned_words': learned_all,
-                'learned_today': learned_today,
-                'progress_percent': progress_percent,
-                'is_locked': is_locked,
-                'unlock_in_days': unlock_in_days,
-            })
+        # metrics of all lists come from a fixed number of grouped queries
+        metrics = ListMetricsService(self.request.user)
         # keep original 'custom_lists' name for compatibility; expose metrics under a different key
-        context['custom_lists_metrics'] = custom_lists_with_metrics
+        context['custom_lists_metrics'] = metrics.for_lists(custom_qs)
         context['current_level'] = level
-        context['levels'] = LanguageLevel.objects.all().order_by('code')
-        # also adapt system lists from queryset returned by get_queryset
-        system_qs = context.get('system_lists')
-        system_lists_with_metrics = []
-        for vlist in system_qs:
-            total_words = vlist.words.count()
-            # number of words that reached the learned threshold
-            learned_count = Progress.objects.filter(user=self.request.user, word__vocab_list=vlist, correct_count__gte=LEARNED_THRESHOLD).count()
-            learned_all = learned_count
-            learned_today = Progress.objects.filter(
-                user=self.request.user,
-                word__vocab_list=vlist,
-                last_correct=today,
-                correct_count__gte=LEARNED_THRESHOLD,
-            ).count()
-            progress_percent = round((learned_all / total_words) * 100, 1) if total_words > 0 else 0.0
-            # lock state for system lists
-            is_locked = False
-            unlock_in_days = 0
-            if total_words > 0 and learned_count == total_words:
-                last_learned = Progress.objects.filter(
-                    user=self.request.user, word__vocab_list=vlist, correct_count__gte=LEARNED_THRESHOLD
-                ).aggregate(max_date=Max('last_correct'))['max_date']
-                if last_learned:
-                    next_available = last_learned + timedelta(days=LOCK_DAYS)
-                    delta = (next_available - today).days
-                    if delta > 0:
-                        is_locked = True
-                        unlock_in_days = delta
-
-            system_lists_with_metrics.append({
-                'pk': vlist.pk,
-                'name': vlist.name,
-                'total_words': total_words,
-                'learned_words': learned_all,
-                'learned_today': learned_today,
-                'progress_percent': progress_percent,
-                'is_locked': is_locked,
-                'unlock_in_days': unlock_in_days,
-            })
+        context['levels'] = reference.get_levels()
         # keep original 'system_lists' (provided by ListView) for global templates; give metrics separately
-        context['system_lists_metrics'] = system_lists_with_metrics
+        context['system_lists_metrics'] = metrics.for_lists(context['system_lists'])
         return context
 
 class ListDetailView(LoginRequiredMixin, DetailView):
@@ -130,9 +50,6 @@ class ListDetailView(LoginRequiredMixin, DetailView):
         context = super().get_context_data(**kwargs)
         vocab_list = self.get_object()
         
-        # today is used to compute learned_today (mastered today)
-        today = timezone.localdate()
-
         progress_subquery = Progress.objects.filter(
             user=self.request.user, word=OuterRef('pk')
         ).values('correct_count')[:1]
@@ -145,26 +62,19 @@ class ListDetailView(LoginRequiredMixin, DetailView):
         ).order_by('word')
 
         context['words'] = words
-        context['total_words'] = words.count()
-        # total learned (correct_count >= LEARNED_THRESHOLD)
-        learned_all = words.filter(progress_count__gte=LEARNED_THRESHOLD).count()
-        learned_today = Progress.objects.filter(
-            user=self.request.user,
-            word__vocab_list=vocab_list,
-            last_correct=today,
-            correct_count__gte=LEARNED_THRESHOLD,
-        ).count()
-        progress_percent = round((learned_all / context['total_words']) * 100, 1) if context['total_words'] > 0 else 0.0
-        context['learned_words'] = learned_all
-        context['learned_today'] = learned_today
-        # compute circle dash offset (same circumference used elsewhere)
-        CIRC = 283.0
-        # compute using raw fraction to avoid rounding issues
-        fraction = (learned_all / context['total_words']) if context['total_words'] > 0 else 0.0
-        context['progress_offset'] = max(0.0, min(CIRC, CIRC * (1.0 - fraction)))
-        context['progress_percent'] = progress_percent
+        metrics = ListMetricsService(self.request.user).for_list(vocab_list)
+        for key in ('total_words', 'learned_words', 'learned_today', 'progress_offset', 'progress_percent'):
+            context[key] = metrics[key]
         return context
 
+def get_source_list(user, pk):
+    """A list the user may pick words from (a system list or one of their own), or None."""
+    try:
+        return VocabularyList.objects.filter(Q(is_system=True) | Q(created_by=user)).get(pk=pk)
+    except (VocabularyList.DoesNotExist, ValueError, TypeError):
+        return None
+
+
 class CreateListView(LoginRequiredMixin, CreateView):
     model = VocabularyList
     template_name = 'vocab/create_list.html'
@@ -190,49 +100,57 @@ class CreateListView(LoginRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        from_id = self.request.GET.get('from')
-        if from_id:
-            try:
-                source_list = VocabularyList.objects.get(pk=from_id)
-                context['source_list'] = source_list
-                context['source_words'] = source_list.words.all().order_by('word')
-            except VocabularyList.DoesNotExist:
-                pass
-        if self.request.method == 'POST':
-            try:
-                context['selected_word_ids'] = set(int(x) for x in self.request.POST.getlist('words'))
-            except (TypeError, ValueError):
-                context['selected_word_ids'] = set()
-        else:
-            context['selected_word_ids'] = set()
-        context['system_lists'] = VocabularyList.objects.filter(is_system=True).select_related('level')
-        context['levels'] = LanguageLevel.objects.all().order_by('code')
+        source_pk = self.request.POST.get('source') or self.request.GET.get('from')
+        source_list = get_source_list(self.request.user, source_pk)
+        if source_list is not None:
+            context['source_list'] = source_list
+            context['autocomplete_limit'] = autocomplete.AUTOCOMPLETE_LIMIT
+        # the source words are paged in by the picker (ListWordsView); a re-displayed
+        # form only repeats the selection, and renders the individually posted words
+        post = self.request.POST
+        context['selection'] = {field: post.get(field, '') for field in ('word_ranges', 'all_words', 'exclude')}
+        word_ids = [pk for pk in post.getlist('words') if pk.isdigit()]
+        context['selected_words'] = Word.objects.filter(pk__in=word_ids).order_by('word') if word_ids else []
+        context['system_lists'] = reference.get_system_lists()
+        context['levels'] = reference.get_levels()
         return context
 
+    def get_selection(self):
+        """
+        Pks of the picked words: the individually posted ``words``, plus the
+        words of the ``source`` list within ``word_ranges`` (or all of them if
+        ``all_words`` is set) that are not within the ``exclude`` ranges.
+        Raises ValueError for a malformed selection.
+        """
+        post = self.request.POST
+        word_ids = [int(pk) for pk in post.getlist('words')]
+        ranges = memberships.parse_ranges(post.get('word_ranges', ''))
+        all_words = post.get('all_words') == '1'
+        if ranges or all_words:
+            source = get_source_list(self.request.user, post.get('source'))
+            if source is None:
+                raise ValueError('Unknown source list')
+            exclude = memberships.parse_ranges(post.get('exclude', ''))
+            word_ids += memberships.select_word_ids(source, ranges, all_words, exclude)
+        return word_ids
+
     def form_valid(self, form):
+        try:
+            word_ids = self.get_selection()
+        except ValueError:
+            messages.error(self.request, 'The word selection is invalid, please pick the words again.')
+            return self.form_invalid(form)
+
         form.instance.created_by = self.request.user
         form.instance.is_system = False
         
         # Save the list first
         self.object = form.save()
         
-        # Copy words if provided
-        word_ids = self.request.POST.getlist('words')
+        # Reference the picked words; they are shared, not copied
         if word_ids:
-            original_words = Word.objects.filter(pk__in=word_ids)
-            words_to_create = []
-            for w in original_words:
-                words_to_create.append(Word(
-                    word=w.word,
-                    translation=w.translation,
-                    vocab_list=self.object,
-                    word_type=w.word_type,
-                    example=w.example,
-                    example_translation=w.example_translation,
-                    metadata=w.metadata,
-                ))
-            Word.objects.bulk_create(words_to_create)
-            messages.success(self.request, f'List "{self.object.name}" created with {len(words_to_create)} words.')
+            added = memberships.add_words(self.object, word_ids)
+            messages.success(self.request, f'List "{self.object.name}" created with {added} words.')
         else:
             messages.success(self.request, f'List "{self.object.name}" created.')
             
@@ -250,12 +168,11 @@ class DeleteListView(LoginRequiredMixin, DeleteView):
     def get_queryset(self):
         return VocabularyList.objects.filter(created_by=self.request.user, is_system=False)
 
-    def delete(self, request, *args, **kwargs):
-        vocab_list = self.get_object()
-        if request.user.active_lists.filter(pk=vocab_list.pk).exists():
-            request.user.active_lists.remove(vocab_list)
+    def form_valid(self, form):
+        # DeleteView calls form_valid on POST; the bulk path also unlinks the list from active_lists
+        deletion.delete_lists([self.object])
         messages.success(self.request, 'List deleted.')
-        return super().delete(request, *args, **kwargs)
+        return redirect(self.get_success_url())
 
 class VocabularyView(LoginRequiredMixin, ListView):
     model = Word
@@ -265,36 +182,120 @@ class VocabularyView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         level = self.request.GET.get('level')
-        qs = Word.objects.select_related('vocab_list', 'vocab_list__level').order_by('word')
+        qs = Word.objects.select_related('vocab_list', 'vocab_list__level').order_by('word', 'pk')
         if level:
             qs = qs.filter(vocab_list__level__code=level)
         return qs
 
+    def paginate_queryset(self, queryset, page_size):
+        query = self.request.GET.get('q', '').strip()
+        if query:
+            # ranked search results are shown on a single page
+            within = queryset if self.request.GET.get('level') else None
+            return None, None, search.search_words(query, limit=page_size, within=within), False
+        # keyset pagination on (word, pk): deep pages cost the same as the first,
+        # and the total shown is a cached approximate count
+        paginator = KeysetPaginator(queryset, page_size, keys=('word', 'pk'), with_count=True)
+        page = paginator.page(after=self.request.GET.get('after'), before=self.request.GET.get('before'))
+        return paginator, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['current_level'] = self.request.GET.get('level')
+        context['levels'] = reference.get_levels()
+        context['query'] = self.request.GET.get('q', '').strip()
         return context
 
 
+class WordSearchView(LoginRequiredMixin, View):
+    """JSON word search: ?q=<text>[&level=<code>][&limit=<n>]"""
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        level = request.GET.get('level')
+        try:
+            limit = max(1, min(int(request.GET.get('limit', search.SEARCH_LIMIT)), search.SEARCH_LIMIT))
+        except ValueError:
+            limit = search.SEARCH_LIMIT
+        within = Word.objects.filter(vocab_list__level__code=level) if level else None
+
+        results = [
+            {
+                'id': word.pk,
+                'word': word.word,
+                'translation': word.translation,
+                'word_type': word.word_type,
+                'level': word.vocab_list.level.code,
+                'list_id': word.vocab_list_id,
+                'list': word.vocab_list.name,
+            }
+            for word in search.search_words(query, limit=limit, within=within)
+        ]
+        return JsonResponse({'query': query, 'results': results})
+
+
+class ListWordsView(LoginRequiredMixin, View):
+    """
+    JSON page of a list's words for the word picker, ordered by word:
+    ?after=<cursor>|before=<cursor>[&limit=<n>][&fields=pk,word,translation]
+    """
+    fields = ('pk', 'word', 'translation', 'word_type')
+    default_fields = ('pk', 'word', 'translation')
+    page_size = 50
+    max_page_size = 200
+
+    def get(self, request, pk):
+        vocab_list = get_source_list(request.user, pk)
+        if vocab_list is None:
+            raise Http404('No such list')
+        fields = [field for field in request.GET.get('fields', '').split(',') if field in self.fields]
+        fields = fields or list(self.default_fields)
+        try:
+            limit = max(1, min(int(request.GET.get('limit', self.page_size)), self.max_page_size))
+        except ValueError:
+            limit = self.page_size
+
+        # only the requested columns (and the cursor key) are read
+        words = vocab_list.words.only('word', *[field for field in fields if field != 'pk'])
+        page = KeysetPaginator(words, per_page=limit).page(
+            after=request.GET.get('after'), before=request.GET.get('before')
+        )
+        return JsonResponse({
+            'results': [{field: getattr(word, field) for field in fields} for word in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+
+class WordAutocompleteView(LoginRequiredMixin, View):
+    """JSON word picker candidates: ?list=<pk>&q=<prefix>[&limit=<n>]"""
+
+    def get(self, request):
+        vocab_list = get_source_list(request.user, request.GET.get('list'))
+        if vocab_list is None:
+            raise Http404('No such list')
+        query = request.GET.get('q', '').strip()
+        try:
+            limit = max(1, min(int(request.GET.get('limit', autocomplete.AUTOCOMPLETE_LIMIT)), autocomplete.AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = autocomplete.AUTOCOMPLETE_LIMIT
+
+        results = [
+            {'id': pk, 'word': word, 'translation': translation, 'word_type': word_type}
+            for pk, word, translation, word_type in autocomplete.complete(vocab_list, query, limit)
+        ]
+        return JsonResponse({'query': query, 'results': results})
+
+
 class StartLessonView(LoginRequiredMixin, View):
     def post(self, request, pk, mode):
         vocab_list = get_object_or_404(VocabularyList, pk=pk)
 
         # Check if the list is temporarily locked (all words learned and within LOCK_DAYS)
-        total_words = vocab_list.words.count()
-        if total_words > 0:
-            learned_count = Progress.objects.filter(user=request.user, word__vocab_list=vocab_list, correct_count__gte=LEARNED_THRESHOLD).count()
-            if learned_count == total_words:
-                last_learned = Progress.objects.filter(
-                    user=request.user, word__vocab_list=vocab_list, correct_count__gte=LEARNED_THRESHOLD
-                ).aggregate(max_date=Max('last_correct'))['max_date']
-                if last_learned:
-                    next_available = last_learned + timedelta(days=LOCK_DAYS)
-                    today = timezone.localdate()
-                    if next_available > today:
-                        days = (next_available - today).days
-                        messages.warning(request, f'This list is locked. Available in {days} days.')
-                        return redirect('vocab_lists')
+        metrics = ListMetricsService(request.user).for_list(vocab_list, learned_today=False)
+        if metrics['is_locked']:
+            messages.warning(request, f"This list is locked. Available in {metrics['unlock_in_days']} days.")
+            return redirect('vocab_lists')
 
         if vocab_list not in request.user.active_lists.all():
             request.user.active_lists.add(vocab_list)
@@ -303,5 +304,8 @@ class StartLessonView(LoginRequiredMixin, View):
             return redirect("lesson_input", pk=pk)
         elif mode == "select":
             return redirect("lesson_select", pk=pk)
+        elif mode == "round":
+            # multiple choice, checked in the browser and saved once per round
+            return redirect(reverse("lesson_round", args=[pk]) + "?mode=select")
         else:
             return redirect("vocab_lists")
\ No newline at end of file